@@ -10,7 +10,7 @@ env = environ.Env(
 )
 environ.Env.read_env(BASE_DIR / '.env')
 
-DEBUG = True
+DEBUG = env('DEBUG')
 SECRET_KEY = env('SECRET_KEY')
 ENVIRONMENT = env('ENVIRONMENT')
 SITE_ID = int(env('SITE_ID'))
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
 
@@ -85,6 +86,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     # DJANGO MIDDLEWARES
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -95,6 +97,7 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
 
     # YOUR MIDDLEWARES
+    'src.services.courses.middleware.InstructorMiddleware',
 ]
 
 # Add development-only middleware
@@ -102,11 +105,11 @@ if DEBUG:
     MIDDLEWARE.append('django_browser_reload.middleware.BrowserReloadMiddleware')
 
 AUTHENTICATION_BACKENDS = [
-    # DJANGO BACKENDS
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
-
     # YOUR BACKENDS
+    # e-mail/password logins (ACCOUNT_LOGIN_METHODS is e-mail only), in place of both
+    # django.contrib.auth.backends.ModelBackend and allauth.account.auth_backends.AuthenticationBackend;
+    # a second password backend would fetch and hash again after every failed login
+    'src.services.users.backends.EmailBackend',
 ]
 
 TEMPLATES = [
@@ -144,9 +147,22 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # a file rather than in-memory, so the concurrent enrollment tests can run their threads
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
+""" CACHE CONFIGURATION --------------------------------------------------------------------------------"""
+# use a shared backend (e.g. redis://127.0.0.1:6379/1) on the server so invalidation reaches every worker
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+# seconds each process keeps its copy of the Application singleton when no save has bumped the
+# shared version; bounds how stale it gets when the bump does not reach the process
+APPLICATION_CACHE_TIMEOUT = env.int('APPLICATION_CACHE_TIMEOUT', default=60)
+# full-page cache for anonymous visitors of the public pages, purged on model saves
+PAGE_CACHE_TIMEOUT = env.int('PAGE_CACHE_TIMEOUT', default=60 * 60)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -187,6 +203,52 @@ STATIC_ROOT = BASE_DIR / 'assets'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+""" INSTRUCTOR PORTAL --------------------------------------------------------------------------------"""
+# seconds the logged-in instructor is served from a session snapshot before it is re-read
+# (and is_active re-checked); 0 looks the instructor up on every request. Saving an instructor
+# drops the snapshots at once through a cache version, which needs a shared CACHE_URL to reach
+# every process
+INSTRUCTOR_SESSION_SNAPSHOT_TIMEOUT = env.int('INSTRUCTOR_SESSION_SNAPSHOT_TIMEOUT', default=5 * 60)
+
+""" PAGINATION --------------------------------------------------------------------------------"""
+# large listings (admin changelists, public video list) stop counting rows exactly past this size
+APPROXIMATE_COUNT_THRESHOLD = env.int('APPROXIMATE_COUNT_THRESHOLD', default=10000)
+APPROXIMATE_COUNT_CACHE_TIMEOUT = env.int('APPROXIMATE_COUNT_CACHE_TIMEOUT', default=10 * 60)
+
+""" STATIC DELIVERY --------------------------------------------------------------------------------"""
+# collectstatic writes content-hashed copies plus .gz/.br variants; WhiteNoise serves them
+# ahead of the URL routing with far-future immutable cache headers
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'src.core.storages.ThemeManifestStaticFilesStorage'},
+    # admin report exports hold student details: kept outside MEDIA_ROOT, served only by the admin
+    'reports': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': BASE_DIR / 'private' / 'reports', 'base_url': None},
+    },
+}
+WHITENOISE_MANIFEST_STRICT = False
+# turn off once a front web server handles /media/ (see README)
+SERVE_MEDIA = env.bool('SERVE_MEDIA', default=True)
+
+""" IMAGE VARIANTS --------------------------------------------------------------------------------"""
+# resized WebP/JPEG copies of uploaded images, stored under MEDIA_ROOT by content hash
+IMAGE_VARIANT_ROOT = 'variants'
+IMAGE_VARIANT_WIDTHS = [320, 640, 960, 1280]
+IMAGE_VARIANT_CACHE_BYTES = env.int('IMAGE_VARIANT_CACHE_BYTES', default=1024 * 1024 * 1024)
+
+""" VIDEO DELIVERY --------------------------------------------------------------------------------"""
+# '' streams ranges from Django; 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache) hands the transfer off
+VIDEO_SENDFILE_BACKEND = env('VIDEO_SENDFILE_BACKEND', default='')
+VIDEO_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+VIDEO_CACHE_MAX_AGE = 60 * 60 * 24
+
+""" REPORT EXPORTS --------------------------------------------------------------------------------"""
+# identical admin export requests within this many seconds reuse the stored file
+REPORT_EXPORT_REUSE_SECONDS = env.int('REPORT_EXPORT_REUSE_SECONDS', default=15 * 60)
+# a running export not finished within this many seconds is treated as crashed and queued again
+REPORT_EXPORT_LEASE_SECONDS = env.int('REPORT_EXPORT_LEASE_SECONDS', default=60 * 60)
+
 """ RESIZER IMAGE --------------------------------------------------------------------------------"""
 DJANGORESIZED_DEFAULT_SIZE = [1920, 1080]
 DJANGORESIZED_DEFAULT_QUALITY = 75
@@ -3,7 +3,7 @@ from django.urls import path, include, re_path
 from django.views.generic import TemplateView
 from django.views.static import serve
 
-from root.settings import ENVIRONMENT, MEDIA_ROOT, STATIC_ROOT
+from root.settings import ENVIRONMENT, MEDIA_ROOT, SERVE_MEDIA
 from src.core.handlers import (
     handler404, handler500
 )
@@ -33,10 +33,11 @@ urlpatterns += [
 
 
 """ STATIC AND MEDIA FILES ----------------------------------------------------------------------------------------- """
-urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': MEDIA_ROOT}),
-    re_path(r'^static/(?P<path>.*)$', serve, {'document_root': STATIC_ROOT}),
-]
+# static files are answered by WhiteNoiseMiddleware before they reach the URL routing
+if SERVE_MEDIA:
+    urlpatterns += [
+        re_path(r'^media/(?P<path>.*)$', serve, {'document_root': MEDIA_ROOT}),
+    ]
 
 
 """ DEVELOPMENT ONLY -------------------------------------------------------------------------------------------- """
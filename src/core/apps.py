@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
@@ -8,4 +9,7 @@ class CoreConfig(AppConfig):
     default_auto_config = 'django.db.models.BigAutoField'
 
     def ready(self):
+        import src.core.checks
         import src.core.signals
+        from src.core.search import create_search_index
+        post_migrate.connect(create_search_index, sender=self, dispatch_uid="core_search_index_create")
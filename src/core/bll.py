@@ -1,6 +1,157 @@
-from .models import Application
+import hashlib
+import logging
+import tempfile
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+
+from . import mp4
+from .models import Application, Video
+
+logger = logging.getLogger(__name__)
+
+APPLICATION_VERSION_CACHE_KEY = 'core:application:version'
+
+# process-local copy of the singleton, stored as (version, application, fetched_at)
+_application_cache = (None, None, 0)
 
 
 def get_or_create_application():
     applications = Application.objects.all()
     return applications[0] if applications else Application.objects.create()
+
+
+def get_application_version():
+    version = cache.get(APPLICATION_VERSION_CACHE_KEY)
+    if version is None:
+        version = bump_application_version()
+    return version
+
+
+def bump_application_version():
+    version = time.time_ns()
+    cache.set(APPLICATION_VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def get_cached_application():
+    """
+    Return the Application singleton from the process-local cache, refetching it when the
+    shared version stamp has been bumped by a save/delete in any process, and at the latest
+    after APPLICATION_CACHE_TIMEOUT seconds in case the bump did not reach this process.
+    """
+    global _application_cache
+    version = get_application_version()
+    cached_version, application, fetched_at = _application_cache
+    if (
+        application is None or cached_version != version
+        or time.monotonic() - fetched_at > settings.APPLICATION_CACHE_TIMEOUT
+    ):
+        application = get_or_create_application()
+        _application_cache = (version, application, time.monotonic())
+    return application
+
+
+def invalidate_application_cache():
+    global _application_cache
+    _application_cache = (None, None, 0)
+    bump_application_version()
+
+
+PAGE_CACHE_VERSION_KEY = 'core:page:{}:version'
+PAGE_CACHE_KEY = 'core:page:{}:{}:{}'
+# version shared by every cached page, bumped when something they all embed (e.g. image variant URLs) goes away
+ALL_PAGES_VERSION_NAME = '*'
+
+# model label -> names of the cached pages rendered from it
+_page_dependencies = defaultdict(set)
+
+
+def register_cached_page(name, models):
+    for model in models:
+        _page_dependencies[model._meta.label].add(name)
+
+
+def get_dependent_pages(model):
+    return _page_dependencies.get(model._meta.label, set())
+
+
+def get_page_cache_key(name, path):
+    keys = [PAGE_CACHE_VERSION_KEY.format(name), PAGE_CACHE_VERSION_KEY.format(ALL_PAGES_VERSION_NAME)]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    digest = hashlib.md5(path.encode('utf-8')).hexdigest()
+    return PAGE_CACHE_KEY.format(name, '.'.join(str(versions[key]) for key in keys), digest)
+
+
+def invalidate_cached_pages(*names):
+    """Bump the version of each page so every cached variant of it (query strings included) misses"""
+    version = time.time_ns()
+    cache.set_many({PAGE_CACHE_VERSION_KEY.format(name): version for name in names}, None)
+
+
+def invalidate_all_cached_pages():
+    invalidate_cached_pages(ALL_PAGES_VERSION_NAME)
+
+
+def process_video(video, relocate=True):
+    """
+    Relocate the moov atom of an uploaded MP4 ahead of its media data so playback can start
+    straight away, and record duration, resolution and bitrate. The rewrite streams through a
+    temporary file; only the moov atom is held in memory. With relocate=False only the metadata
+    is read, and a file that still needs the rewrite is left with is_faststart unset.
+    """
+    storage = video.video_file.storage
+    name = video.video_file.name
+    size = video.video_file.size
+    with storage.open(name, 'rb') as source:
+        atoms, moov, faststart = mp4.inspect(source, size)
+        metadata = mp4.read_metadata(moov)
+        if not faststart and relocate:
+            with tempfile.TemporaryFile() as output:
+                mp4.write_faststart(source, output, atoms, moov)
+                output.seek(0)
+                relocated = storage.save(name, File(output))
+
+    if not faststart and relocate:
+        storage.delete(name)
+        name = relocated
+        faststart = True
+
+    duration = metadata['duration']
+    updates = {
+        'video_file': name,
+        'is_faststart': faststart,
+        'duration': timedelta(seconds=duration) if duration else None,
+        'width': metadata['width'],
+        'height': metadata['height'],
+        'bitrate': round(size * 8 / duration) if duration else None,
+    }
+    # a queryset update keeps this out of the post_save handler that triggered it
+    Video.objects.filter(pk=video.pk).update(**updates)
+    for field, value in updates.items():
+        setattr(video, field, value)
+    video._loaded_video_file = name
+    return video
+
+
+def process_uploaded_video(video):
+    """
+    Read the metadata of a new upload right after commit. The moov rewrite of a file that is not
+    fast-start yet can take minutes on a large upload, so it is left to the process_videos command.
+    """
+    try:
+        process_video(video, relocate=False)
+    except (OSError, mp4.MP4Error) as error:
+        logger.warning('Could not post-process video %s (%s): %s', video.pk, video.video_file.name, error)
+        # drop whatever the previous file recorded; process_videos reports the file again
+        Video.objects.filter(pk=video.pk).update(
+            is_faststart=False, duration=None, width=None, height=None, bitrate=None
+        )
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# backends that keep their entries inside one process, so a version bump never reaches the other workers
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """On the server the default cache carries the invalidation stamps, so it must be shared by all workers"""
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.ENVIRONMENT != 'server' or backend not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        f'The default cache ({backend}) is local to each process.',
+        hint=(
+            'Set CACHE_URL to a shared backend such as redis://127.0.0.1:6379/1; otherwise Application, page '
+            'and instructor invalidations only reach the worker that saved the change.'
+        ),
+        id='core.E001',
+    )]
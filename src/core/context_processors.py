@@ -1,5 +1,5 @@
-from .bll import get_or_create_application
+from .bll import get_cached_application
 
 
 def application(request):
-    return {'app': get_or_create_application()}
\ No newline at end of file
+    return {'app': get_cached_application()}
@@ -1,9 +1,16 @@
 import django_filters
 from .models import Video
+from .search import is_search_available, order_by_ids, search
 
 class VideoFilter(django_filters.FilterSet):
-    title = django_filters.CharFilter(field_name='title', lookup_expr='icontains')
+    title = django_filters.CharFilter(method='search_videos')
 
     class Meta:
         model = Video
         fields = ['title']
+
+    def search_videos(self, queryset, name, value):
+        # ranked full-text matches on title and description, best first
+        if not is_search_available():
+            return queryset.filter(title__icontains=value)
+        return order_by_ids(queryset, [object_id for _, object_id in search(value, kinds=('video',))])
@@ -0,0 +1,141 @@
+import hashlib
+import io
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .bll import invalidate_all_cached_pages
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DIGEST_CACHE_KEY = 'core:image:{}:digest'
+IMAGE_VARIANTS_CACHE_KEY = 'core:image:{}:variants'
+IMAGE_DIGEST_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# format -> (Pillow encoder, mime type, encoder options)
+IMAGE_VARIANT_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def get_source_digest(field_file):
+    """
+    Content hash of an uploaded image, cached per name, size and modification time so a file
+    replaced under a reused name is hashed again.
+    """
+    storage, name = field_file.storage, field_file.name
+    stamp = f'{name}:{storage.size(name)}:{storage.get_modified_time(name).timestamp()}'
+    key = IMAGE_DIGEST_CACHE_KEY.format(hashlib.md5(stamp.encode('utf-8')).hexdigest())
+    digest = cache.get(key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with storage.open(name, 'rb') as source:
+            for chunk in iter(lambda: source.read(64 * 1024), b''):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()[:32]
+        cache.set(key, digest, IMAGE_DIGEST_CACHE_TIMEOUT)
+    return digest
+
+
+def get_variant_name(digest, width, extension):
+    return f'{settings.IMAGE_VARIANT_ROOT}/{digest[:2]}/{digest}/{width}.{extension}'
+
+
+def _encode(image, width, encoder, options):
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+    if encoder == 'JPEG' and resized.mode != 'RGB':
+        resized = resized.convert('RGB')
+    elif resized.mode not in ('RGB', 'RGBA'):
+        resized = resized.convert('RGBA')
+    output = io.BytesIO()
+    resized.save(output, encoder, **options)
+    return output.getvalue()
+
+
+def generate_image_variants(field_file, digest):
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    # buckets wider than the upload collapse onto its own width
+    widths = sorted({min(width, image.width) for width in settings.IMAGE_VARIANT_WIDTHS})
+    variants = {}
+    for extension, (encoder, mime_type, options) in IMAGE_VARIANT_FORMATS.items():
+        variants[extension] = []
+        for width in widths:
+            name = get_variant_name(digest, width, extension)
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(_encode(image, width, encoder, options)))
+            variants[extension].append((width, storage.url(name)))
+
+    manifest = {'width': image.width, 'height': image.height, 'variants': variants}
+    cache.set(IMAGE_VARIANTS_CACHE_KEY.format(digest), manifest, None)
+    return manifest
+
+
+def get_image_variants(field_file):
+    """
+    Return {'width', 'height', 'variants': {extension: [(width, url), ...]}} for an uploaded image,
+    generating the derivatives on first use. Returns None when the source cannot be read.
+    """
+    if not field_file:
+        return None
+    try:
+        digest = get_source_digest(field_file)
+        manifest = cache.get(IMAGE_VARIANTS_CACHE_KEY.format(digest))
+        if manifest is None:
+            manifest = generate_image_variants(field_file, digest)
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        logger.warning('Could not build image variants for %s: %s', field_file.name, error)
+        return None
+    return manifest
+
+
+def evict_image_variants(storage, keep=None):
+    """
+    Delete the oldest variant sets until the variant cache fits in IMAGE_VARIANT_CACHE_BYTES.
+    The set named by `keep` is never evicted. This walks the whole variant tree, so it runs from
+    the evict_image_variants command rather than on page renders; cached pages are purged when
+    anything was deleted, since their HTML may still point at the evicted files.
+    """
+    root = settings.IMAGE_VARIANT_ROOT
+    if not storage.exists(root):
+        return 0
+
+    sets = []
+    for prefix in storage.listdir(root)[0]:
+        for digest in storage.listdir(f'{root}/{prefix}')[0]:
+            directory = f'{root}/{prefix}/{digest}'
+            names = [f'{directory}/{name}' for name in storage.listdir(directory)[1]]
+            if names:
+                created = max(storage.get_modified_time(name) for name in names)
+                sets.append((created, digest, names, sum(storage.size(name) for name in names)))
+
+    total = sum(size for _, _, _, size in sets)
+    evicted = 0
+    for created, digest, names, size in sorted(sets):
+        if total <= settings.IMAGE_VARIANT_CACHE_BYTES:
+            break
+        if digest == keep:
+            continue
+        cache.delete(IMAGE_VARIANTS_CACHE_KEY.format(digest))
+        for name in names:
+            storage.delete(name)
+        total -= size
+        evicted += 1
+    if evicted:
+        invalidate_all_cached_pages()
+    return evicted
+
+
+def build_image_variants_on_commit(field_file):
+    """Generate the derivatives of a freshly saved image once the upload is committed"""
+    if field_file:
+        transaction.on_commit(lambda: get_image_variants(field_file))
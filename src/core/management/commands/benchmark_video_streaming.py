@@ -0,0 +1,88 @@
+import random
+import statistics
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import reverse
+
+from src.core.models import Video
+from src.web.website.views import stream_video
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure video streaming throughput for many concurrent viewers seeking with Range requests. '
+        'Without --base-url the view is called in-process from threads, which times the view and '
+        'storage reads only, not HTTP, the web server or sendfile; pass the URL of a running server '
+        'to measure real delivery.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', help='Send real HTTP requests to a running server, e.g. http://localhost:8000'
+        )
+        parser.add_argument('--video', type=int, help='Video id to stream (defaults to the latest upload)')
+        parser.add_argument('--viewers', type=int, default=50, help='Concurrent viewers')
+        parser.add_argument('--requests', type=int, default=20, help='Range requests per viewer')
+        parser.add_argument('--range-size', type=int, default=1024 * 1024, help='Bytes asked for per request')
+
+    def handle(self, *args, **options):
+        videos = Video.objects.order_by('-publish_date')
+        video = videos.filter(pk=options['video']).first() if options['video'] else videos.first()
+        if video is None or not video.video_file:
+            raise CommandError('No uploaded video to stream')
+
+        try:
+            size = video.video_file.size
+        except FileNotFoundError:
+            raise CommandError(f'The file of video {video.pk} is missing')
+        url = reverse('website:video_stream', args=[video.pk])
+        factory = RequestFactory()
+        range_size = options['range_size']
+        base_url = (options['base_url'] or '').rstrip('/')
+
+        def fetch(byte_range):
+            if base_url:
+                request = urllib.request.Request(base_url + url, headers={'Range': byte_range})
+                with urllib.request.urlopen(request) as response:
+                    return len(response.read())
+            response = stream_video(factory.get(url, HTTP_RANGE=byte_range), video.pk)
+            transferred = sum(len(chunk) for chunk in response.streaming_content) if response.streaming else 0
+            response.close()
+            return transferred
+
+        def viewer(seed):
+            rng = random.Random(seed)
+            transferred, latencies = 0, []
+            try:
+                for _ in range(options['requests']):
+                    start = rng.randrange(size)
+                    began = perf_counter()
+                    transferred += fetch(f'bytes={start}-{start + range_size - 1}')
+                    latencies.append(perf_counter() - began)
+            finally:
+                connection.close()
+            return transferred, latencies
+
+        began = perf_counter()
+        with ThreadPoolExecutor(max_workers=options['viewers']) as executor:
+            results = list(executor.map(viewer, range(options['viewers'])))
+        elapsed = perf_counter() - began
+
+        transferred = sum(result[0] for result in results)
+        latencies = sorted(latency for result in results for latency in result[1])
+        target = base_url or f"in-process, backend: {settings.VIDEO_SENDFILE_BACKEND or 'django'}"
+        self.stdout.write(f"Video: {video.title} ({size / 1024 / 1024:.1f} MB), {target}")
+        self.stdout.write(f"{options['viewers']} viewers x {options['requests']} range requests "
+                          f"of {range_size / 1024:.0f} KB in {elapsed:.2f}s")
+        self.stdout.write(f"Requests/s: {len(latencies) / elapsed:.1f}")
+        self.stdout.write(f"Throughput: {transferred / 1024 / 1024 / elapsed:.1f} MB/s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Latency p50: {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms"
+        ))
@@ -0,0 +1,12 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from src.core.images import evict_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Delete the oldest image variant sets until the variants fit in IMAGE_VARIANT_CACHE_BYTES'
+
+    def handle(self, *args, **options):
+        evicted = evict_image_variants(default_storage)
+        self.stdout.write(self.style.SUCCESS(f'Evicted {evicted} image variant sets'))
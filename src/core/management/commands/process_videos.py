@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from src.core import mp4
+from src.core.bll import process_video
+from src.core.models import Video
+
+
+class Command(BaseCommand):
+    help = 'Move the moov atom of uploaded MP4 videos to the front and record their duration, resolution and bitrate'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reprocess videos that were already processed')
+
+    def handle(self, *args, **options):
+        videos = Video.objects.exclude(video_file='').order_by('pk')
+        if not options['all']:
+            videos = videos.filter(is_faststart=False)
+
+        processed = failed = 0
+        for video in videos.iterator():
+            try:
+                process_video(video)
+            except (OSError, mp4.MP4Error) as error:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'{video.pk} {video.title}: {error}'))
+            else:
+                processed += 1
+                self.stdout.write(f'{video.pk} {video.title}: {video.duration_display} {video.resolution_display}')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} videos, {failed} failed'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from src.core.search import is_search_available, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of videos, courses and lessons'
+
+    def handle(self, *args, **options):
+        if not is_search_available():
+            raise CommandError('Full-text search needs SQLite (FTS5) or PostgreSQL')
+        counts = rebuild_search_index()
+        for kind, count in counts.items():
+            self.stdout.write(f'{kind}: {count} documents')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {sum(counts.values())} documents'))
@@ -0,0 +1,110 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse, QueryDict
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .bll import get_application_version, get_page_cache_key, register_cached_page
+
+
+class AnonymousPageCacheMixin:
+    """
+    Serve anonymous GET requests from a full-page cache. Subclasses list the models they render
+    in `cache_dependencies`, and saving or deleting any of those models purges only their pages.
+    Only the query parameters named in `cache_query_params` are part of the cache key, so
+    tracking or random query strings all share the page's one entry.
+    """
+    cache_dependencies = ()
+    cache_query_params = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        register_cached_page(cls.get_page_cache_name(), cls.cache_dependencies)
+
+    @classmethod
+    def get_page_cache_name(cls):
+        return f'{cls.__module__}.{cls.__name__}'
+
+    def is_page_cacheable(self, request):
+        # the header changes for logged in users and instructors, and flash messages are per visitor
+        return (
+            request.method == 'GET'
+            and not request.user.is_authenticated
+            and not request.session.get('instructor_id')
+            and not len(get_messages(request))
+        )
+
+    def get_page_cache_url(self, request):
+        query = QueryDict(mutable=True)
+        for name in sorted(self.cache_query_params):
+            values = [value for value in request.GET.getlist(name) if value]
+            if values:
+                query.setlist(name, values)
+        return f'{request.scheme}://{request.get_host()}{request.path}?{query.urlencode()}'
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = get_page_cache_key(self.get_page_cache_name(), self.get_page_cache_url(request))
+        cached = cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content)
+            for header, value in headers:
+                response.headers[header] = value
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            if hasattr(response, 'render'):
+                response.render()
+            # cookies live in response.cookies and are never part of the stored headers
+            cache.set(key, (response.content, list(response.items())), settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET requests with 304 Not Modified while the client's copy is still fresh. Subclasses
+    override get_validators() to return (etag parts, last modified) from a cheap query; the
+    default None renders normally.
+    """
+
+    def get_validators(self):
+        return None
+
+    def get_etag(self, request, parts):
+        # the header (and enrollment widgets) differ per visitor, and the footer follows the Application
+        visitor = (request.user.pk, request.session.get('instructor_id'))
+        value = repr((parts, visitor, get_application_version()))
+        return quote_etag(hashlib.md5(value.encode('utf-8')).hexdigest())
+
+    def dispatch(self, request, *args, **kwargs):
+        validators = None
+        if request.method in ('GET', 'HEAD') and not len(get_messages(request)):
+            validators = self.get_validators()
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        parts, last_modified = validators
+        etag = self.get_etag(request, parts)
+        # Last-Modified alone cannot tell visitors apart, so only anonymous pages carry it
+        if last_modified is not None and not request.user.is_authenticated and not request.session.get('instructor_id'):
+            last_modified = int(last_modified.timestamp())
+        else:
+            last_modified = None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
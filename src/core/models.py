@@ -159,9 +159,46 @@ class Video(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     video_file = models.FileField(upload_to='videos/')  # store uploaded videos
-    publish_date = models.DateTimeField(auto_now_add=True)
+    publish_date = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    # filled in by the upload post-processing (src.core.bll.process_video)
+    duration = models.DurationField(null=True, blank=True, editable=False)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    bitrate = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text='Average bits per second')
+    is_faststart = models.BooleanField(default=False, editable=False, help_text='moov atom precedes the media data')
+
+    class Meta:
+        ordering = ['-publish_date', '-id']
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored file so a re-upload can be told apart from other edits
+        instance._loaded_video_file = instance.__dict__.get('video_file')
+        return instance
+
+    @property
+    def duration_display(self):
+        if self.duration is None:
+            return ''
+        minutes, seconds = divmod(int(self.duration.total_seconds()), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f'{hours}:{minutes:02d}:{seconds:02d}' if hours else f'{minutes}:{seconds:02d}'
+
+    @property
+    def resolution_display(self):
+        return f'{self.width}×{self.height}' if self.width and self.height else ''
+
+    @property
+    def bitrate_display(self):
+        if not self.bitrate:
+            return ''
+        if self.bitrate >= 1000000:
+            return f'{self.bitrate / 1000000:.1f} Mbps'
+        return f'{self.bitrate // 1000} kbps'
+
 
@@ -0,0 +1,181 @@
+import functools
+import struct
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# atoms whose payload is a plain list of child atoms
+CONTAINER_ATOMS = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'dinf'}
+
+
+class MP4Error(ValueError):
+    pass
+
+
+def raises_mp4_error(function):
+    """Report a truncated or malformed atom (an unpack past the end, a bad index) as MP4Error"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        except MP4Error:
+            raise
+        except (struct.error, IndexError, ValueError) as error:
+            raise MP4Error(f'malformed MP4: {error}') from error
+    return wrapper
+
+
+def read_atom_header(file, offset, end):
+    """Return (type, header size, total size) of the atom at offset"""
+    file.seek(offset)
+    header = file.read(8)
+    if len(header) < 8:
+        raise MP4Error(f'truncated atom header at {offset}')
+    size, kind = struct.unpack('>I4s', header)
+    header_size = 8
+    if size == 1:
+        largesize = file.read(8)
+        if len(largesize) < 8:
+            raise MP4Error(f'truncated 64-bit atom size at {offset}')
+        size = struct.unpack('>Q', largesize)[0]
+        header_size = 16
+    elif size == 0:
+        # the last atom runs to the end of the file
+        size = end - offset
+    if size < header_size or offset + size > end:
+        raise MP4Error(f'invalid size for atom {kind!r} at {offset}')
+    return kind, header_size, size
+
+
+def iter_top_level_atoms(file, size):
+    """Yield (type, offset, header size, total size) without reading any payload"""
+    offset = 0
+    while offset < size:
+        kind, header_size, atom_size = read_atom_header(file, offset, size)
+        yield kind, offset, header_size, atom_size
+        offset += atom_size
+
+
+def iter_child_atoms(data, start=0, end=None):
+    """Yield (type, payload start, atom end) for the atoms packed in an in-memory buffer"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise MP4Error(f'invalid size for atom {kind!r} inside moov')
+        yield kind, offset + header_size, offset + size
+        offset += size
+
+
+def find_atoms(data, path, start=0, end=None):
+    """Yield (payload start, atom end) of every atom matching a path such as (b'trak', b'tkhd')"""
+    for kind, payload, atom_end in iter_child_atoms(data, start, end):
+        if kind != path[0]:
+            continue
+        if len(path) == 1:
+            yield payload, atom_end
+        elif kind in CONTAINER_ATOMS:
+            yield from find_atoms(data, path[1:], payload, atom_end)
+
+
+@raises_mp4_error
+def read_metadata(moov):
+    """
+    Duration in seconds and the video track resolution from a moov atom (header included).
+    Returns {'duration': float | None, 'width': int | None, 'height': int | None}.
+    """
+    metadata = {'duration': None, 'width': None, 'height': None}
+    for payload, _ in find_atoms(moov, (b'moov', b'mvhd')):
+        version = moov[payload]
+        if version == 1:
+            timescale, duration = struct.unpack_from('>IQ', moov, payload + 20)
+        else:
+            timescale, duration = struct.unpack_from('>II', moov, payload + 12)
+        if timescale:
+            metadata['duration'] = duration / timescale
+
+    for trak_payload, trak_end in find_atoms(moov, (b'moov', b'trak')):
+        handlers = [
+            moov[payload + 8:payload + 12]
+            for payload, _ in find_atoms(moov, (b'mdia', b'hdlr'), trak_payload, trak_end)
+        ]
+        if b'vide' not in handlers:
+            continue
+        for _, tkhd_end in find_atoms(moov, (b'tkhd',), trak_payload, trak_end):
+            # width and height are the last two 16.16 fixed point fields of tkhd
+            width, height = struct.unpack_from('>II', moov, tkhd_end - 8)
+            metadata['width'], metadata['height'] = width >> 16, height >> 16
+        break
+    return metadata
+
+
+def shift_chunk_offsets(moov, delta, start=0, end=None):
+    """Add delta to every stco/co64 chunk offset of a moov atom within [start, end), in place"""
+    for kind, entry_format, entry_size in ((b'stco', '>I', 4), (b'co64', '>Q', 8)):
+        for payload, _ in find_atoms(moov, (b'moov', b'trak', b'mdia', b'minf', b'stbl', kind)):
+            count = struct.unpack_from('>I', moov, payload + 4)[0]
+            for index in range(count):
+                position = payload + 8 + index * entry_size
+                offset = struct.unpack_from(entry_format, moov, position)[0]
+                if offset < start or (end is not None and offset >= end):
+                    continue
+                offset += delta
+                if entry_size == 4 and offset > 0xFFFFFFFF:
+                    raise MP4Error('chunk offsets overflow stco; cannot relocate moov')
+                struct.pack_into(entry_format, moov, position, offset)
+
+
+def _copy_range(source, destination, offset, length):
+    source.seek(offset)
+    while length > 0:
+        data = source.read(min(COPY_BUFFER_SIZE, length))
+        if not data:
+            raise MP4Error('unexpected end of file while copying')
+        destination.write(data)
+        length -= len(data)
+
+
+@raises_mp4_error
+def inspect(source, size):
+    """
+    Scan the top-level atoms of an MP4 file. Returns the atom list, the moov atom bytes and
+    whether moov already precedes mdat. Only moov is read into memory.
+    """
+    atoms = list(iter_top_level_atoms(source, size))
+    kinds = [atom[0] for atom in atoms]
+    if b'moov' not in kinds or b'mdat' not in kinds:
+        raise MP4Error('not an MP4 file with moov and mdat atoms')
+    _, offset, _, moov_size = atoms[kinds.index(b'moov')]
+    source.seek(offset)
+    moov = bytearray(source.read(moov_size))
+    if any(True for _ in find_atoms(moov, (b'moov', b'cmov'))):
+        raise MP4Error('compressed moov atoms are not supported')
+    faststart = kinds.index(b'moov') < kinds.index(b'mdat')
+    return atoms, moov, faststart
+
+
+@raises_mp4_error
+def write_faststart(source, destination, atoms, moov):
+    """
+    Rewrite the file with moov ahead of mdat, streaming every other atom from source. The media
+    data moves forward by the moov size, so the chunk offset tables are shifted to match.
+    """
+    first_mdat = next(offset for kind, offset, _, _ in atoms if kind == b'mdat')
+    moov_offset = next(offset for kind, offset, _, _ in atoms if kind == b'moov')
+    # only the bytes between the first mdat and the old moov position move
+    shift_chunk_offsets(moov, len(moov), first_mdat, moov_offset)
+
+    moov_written = False
+    for kind, offset, _, atom_size in atoms:
+        if kind == b'moov':
+            continue
+        if not moov_written and offset >= first_mdat:
+            destination.write(moov)
+            moov_written = True
+        _copy_range(source, destination, offset, atom_size)
@@ -0,0 +1,150 @@
+import base64
+import binascii
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+APPROXIMATE_COUNT_CACHE_KEY = 'approximate_count:{label}:{digest}'
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset with opaque cursors for its neighbours"""
+
+    def __init__(self, object_list, params, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.params = params
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _query(self, cursor_param, cursor):
+        # keep the other GET parameters (filters, search) on the neighbouring pages
+        params = self.params.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params[cursor_param] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query('after', self.next_cursor) if self.next_cursor else ''
+
+    @property
+    def previous_query(self):
+        return self._query('before', self.previous_cursor) if self.previous_cursor else ''
+
+
+def encode_cursor(value, pk):
+    raw = f'{value.isoformat()}|{pk}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (datetime, pk) for a cursor, or None when it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        value, pk = raw.split('|')
+        return datetime.fromisoformat(value), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def paginate_by_keyset(queryset, field, page_size, params):
+    """
+    Newest-first page of `queryset` ordered by (field, pk) descending. Pages are found with a
+    range condition on the last row seen instead of an OFFSET, so every page costs the same
+    index scan no matter how deep it is. The `after`/`before` cursors are read from params
+    (usually request.GET).
+    """
+    before = decode_cursor(params.get('before'))
+    after = decode_cursor(params.get('after')) if before is None else None
+
+    if before is not None:
+        value, pk = before
+        rows = list(queryset.filter(
+            Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+        ).order_by(field, 'pk')[:page_size + 1])
+        has_previous, has_next = len(rows) > page_size, True
+        rows = rows[:page_size][::-1]
+    else:
+        if after is not None:
+            value, pk = after
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+        rows = list(queryset.order_by(f'-{field}', '-pk')[:page_size + 1])
+        has_previous, has_next = after is not None, len(rows) > page_size
+        rows = rows[:page_size]
+
+    if not rows:
+        return KeysetPage(rows, params)
+    return KeysetPage(
+        rows, params,
+        next_cursor=encode_cursor(getattr(rows[-1], field), rows[-1].pk) if has_next else None,
+        previous_cursor=encode_cursor(getattr(rows[0], field), rows[0].pk) if has_previous else None,
+    )
+
+
+def get_estimated_row_count(model, using='default'):
+    """Row count of a whole table from the planner statistics, or None where none are kept"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been vacuumed or analyzed
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that only counts exactly up to APPROXIMATE_COUNT_THRESHOLD rows. Past it, an
+    unfiltered table is sized from the Postgres statistics and any other queryset from a count
+    cached for APPROXIMATE_COUNT_CACHE_TIMEOUT seconds, so page views stop paying for a full
+    COUNT(*). The last page can come up short or empty while the estimate is stale.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        threshold = settings.APPROXIMATE_COUNT_THRESHOLD
+
+        if not queryset.query.where:
+            estimate = get_estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > threshold:
+                return estimate
+
+        # counting a LIMITed subquery stops scanning at the threshold
+        bounded = queryset.order_by()[:threshold + 1].count()
+        if bounded <= threshold:
+            return bounded
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        key = APPROXIMATE_COUNT_CACHE_KEY.format(
+            label=queryset.model._meta.label_lower,
+            digest=hashlib.md5(repr((sql, params)).encode('utf-8')).hexdigest()
+        )
+        return cache.get_or_set(key, queryset.count, settings.APPROXIMATE_COUNT_CACHE_TIMEOUT)
@@ -0,0 +1,208 @@
+import re
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.signals import post_delete, post_save
+
+SEARCH_TABLE = 'core_search_document'
+SEARCH_KINDS = ('video', 'course', 'lesson')
+SEARCH_RESULT_LIMIT = 200
+SEARCH_BATCH_SIZE = 500
+SEARCH_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+Searchable = namedtuple('Searchable', 'model title_field body_fields')
+
+# kind -> Searchable, filled by register_searchable() from each app's signals module
+_searchables = {}
+
+
+class SQLiteSearchBackend:
+    """FTS5 virtual table; the rowid is derived from (kind, object_id) so updates never scan the table"""
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"kind UNINDEXED, object_id UNINDEXED, title, body, tokenize='porter unicode61 remove_diacritics 2')"
+        )
+
+    def _rowid(self, kind, object_id):
+        return object_id * 16 + SEARCH_KINDS.index(kind) + 1
+
+    def index(self, cursor, rows):
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [
+            (self._rowid(kind, object_id),) for kind, object_id, _, _ in rows
+        ])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, title, body) VALUES (%s, %s, %s, %s, %s)",
+            [(self._rowid(kind, object_id), kind, object_id, title, body) for kind, object_id, title, body in rows]
+        )
+
+    def remove(self, cursor, kind, object_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [self._rowid(kind, object_id)])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    def search(self, cursor, tokens, kinds, limit):
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        placeholders = ', '.join(['%s'] * len(kinds))
+        # bm25 is lower for better matches; title hits weigh ten times body hits
+        cursor.execute(
+            f"SELECT kind, object_id FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND kind IN ({placeholders}) "
+            f"ORDER BY bm25({SEARCH_TABLE}, 0, 0, 10.0, 1.0) LIMIT %s",
+            [match, *kinds, limit]
+        )
+        return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    """Table with a generated, weighted tsvector column behind a GIN index"""
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            f"kind varchar(20) NOT NULL, object_id bigint NOT NULL, title text NOT NULL, body text NOT NULL, "
+            f"document tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')"
+            f") STORED, PRIMARY KEY (kind, object_id))"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)")
+
+    def index(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (kind, object_id, title, body) VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT (kind, object_id) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body",
+            rows
+        )
+
+    def remove(self, cursor, kind, object_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND object_id = %s", [kind, object_id])
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+
+    def search(self, cursor, tokens, kinds, limit):
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        cursor.execute(
+            f"SELECT kind, object_id FROM {SEARCH_TABLE}, to_tsquery('english', %s) query "
+            f"WHERE document @@ query AND kind = ANY(%s) "
+            f"ORDER BY ts_rank_cd(document, query) DESC LIMIT %s",
+            [query, list(kinds), limit]
+        )
+        return cursor.fetchall()
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend(),
+    'postgresql': PostgresSearchBackend(),
+}
+
+
+def get_search_backend():
+    return SEARCH_BACKENDS.get(connection.vendor)
+
+
+def is_search_available():
+    return get_search_backend() is not None
+
+
+def create_search_index(**kwargs):
+    """
+    post_migrate handler. The first migrate after the index is introduced also fills it, so
+    search works on existing data without a manual rebuild_search_index.
+    """
+    backend = get_search_backend()
+    if backend is None or SEARCH_TABLE in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        backend.create(cursor)
+    rebuild_search_index()
+
+
+def register_searchable(kind, model, title_field, body_fields):
+    """Index a model under `kind` and keep it current through post_save/post_delete"""
+    if kind not in SEARCH_KINDS:
+        raise ValueError(f'Unknown search kind {kind!r}; add it to SEARCH_KINDS')
+    _searchables[kind] = Searchable(model, title_field, tuple(body_fields))
+    post_save.connect(_index_on_save, sender=model, dispatch_uid=f'search_index_{kind}_save')
+    post_delete.connect(_remove_on_delete, sender=model, dispatch_uid=f'search_index_{kind}_delete')
+
+
+def _kind_of(model):
+    return next(kind for kind, searchable in _searchables.items() if searchable.model is model)
+
+
+def _document(kind, instance):
+    searchable = _searchables[kind]
+    body = '\n'.join(str(getattr(instance, field) or '') for field in searchable.body_fields)
+    return kind, instance.pk, str(getattr(instance, searchable.title_field) or ''), body
+
+
+def index_objects(kind, instances):
+    backend = get_search_backend()
+    rows = [_document(kind, instance) for instance in instances]
+    if backend is not None and rows:
+        with connection.cursor() as cursor:
+            backend.index(cursor, rows)
+
+
+def remove_object(kind, object_id):
+    backend = get_search_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.remove(cursor, kind, object_id)
+
+
+def _index_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        kind = _kind_of(sender)
+        transaction.on_commit(lambda: index_objects(kind, [instance]))
+
+
+def _remove_on_delete(sender, instance, **kwargs):
+    kind, object_id = _kind_of(sender), instance.pk
+    transaction.on_commit(lambda: remove_object(kind, object_id))
+
+
+def rebuild_search_index():
+    """Recreate the index from scratch and return the number of documents per kind"""
+    backend = get_search_backend()
+    if backend is None:
+        return {}
+    counts = {}
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            backend.create(cursor)
+            backend.clear(cursor)
+        for kind, searchable in _searchables.items():
+            fields = ['pk', searchable.title_field, *searchable.body_fields]
+            batch, counts[kind] = [], 0
+            for instance in searchable.model.objects.only(*fields).iterator(chunk_size=SEARCH_BATCH_SIZE):
+                batch.append(instance)
+                if len(batch) >= SEARCH_BATCH_SIZE:
+                    index_objects(kind, batch)
+                    counts[kind] += len(batch)
+                    batch = []
+            index_objects(kind, batch)
+            counts[kind] += len(batch)
+    return counts
+
+
+def search(query, kinds=SEARCH_KINDS, limit=SEARCH_RESULT_LIMIT):
+    """Return [(kind, object_id), ...] best match first; every word matches as a prefix"""
+    backend = get_search_backend()
+    tokens = SEARCH_TOKEN_PATTERN.findall(query or '')
+    if backend is None or not tokens:
+        return []
+    with connection.cursor() as cursor:
+        return [(kind, int(object_id)) for kind, object_id in backend.search(cursor, tokens, kinds, limit)]
+
+
+def order_by_ids(queryset, ids):
+    """Restrict a queryset to ids, keeping the order of the list (e.g. search rank)"""
+    if not ids:
+        return queryset.none()
+    ranking = Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(ranking)
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .bll import get_dependent_pages, invalidate_application_cache, invalidate_cached_pages, process_uploaded_video
+from .images import build_image_variants_on_commit
+from .models import Application, GalleryImage, Testimonial, Video
+from .search import register_searchable
+
+register_searchable('video', Video, 'title', ('description',))
+
+
+@receiver([post_save, post_delete], sender=Application, dispatch_uid="application_cache_invalidate")
+def invalidate_application(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_application_cache)
+
+
+@receiver([post_save, post_delete], dispatch_uid="page_cache_invalidate")
+def invalidate_dependent_pages(sender, **kwargs):
+    pages = get_dependent_pages(sender)
+    if pages:
+        transaction.on_commit(lambda: invalidate_cached_pages(*pages))
+
+
+@receiver(post_save, sender=GalleryImage, dispatch_uid="gallery_image_variants")
+def build_gallery_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        build_image_variants_on_commit(instance.image)
+
+
+@receiver(post_save, sender=Testimonial, dispatch_uid="testimonial_image_variants")
+def build_testimonial_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        build_image_variants_on_commit(instance.author_image)
+
+
+@receiver(post_save, sender=Video, dispatch_uid="video_post_process")
+def post_process_uploaded_video(sender, instance, raw=False, **kwargs):
+    if raw or not instance.video_file:
+        return
+    if instance.video_file.name != getattr(instance, '_loaded_video_file', None):
+        transaction.on_commit(lambda: process_uploaded_video(instance))
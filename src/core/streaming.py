@@ -0,0 +1,115 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+STREAM_CHUNK_SIZE = 256 * 1024
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single-range `Range` header, None when the header is absent,
+    malformed or asks for several ranges (the full body is sent then), or False when unsatisfiable.
+    """
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        # If-Range only accepts strong comparison
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def iter_file_range(file, start, length, chunk_size=STREAM_CHUNK_SIZE):
+    with file:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def ranged_file_response(request, field_file):
+    """
+    Serve an uploaded file with Range/206 and If-Range support. When VIDEO_SENDFILE_BACKEND is set
+    the body (and its ranges) is left to the front web server via X-Accel-Redirect or X-Sendfile.
+    """
+    storage = field_file.storage
+    try:
+        size = field_file.size
+        last_modified = int(storage.get_modified_time(field_file.name).timestamp())
+    except FileNotFoundError:
+        # the row outlived its file (deleted or never synced to this server)
+        raise Http404('The file is missing')
+    etag = quote_etag(f'{size:x}-{last_modified:x}')
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+        backend = settings.VIDEO_SENDFILE_BACKEND
+        if backend == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.VIDEO_ACCEL_REDIRECT_PREFIX + quote(field_file.name)
+        elif backend == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = storage.path(field_file.name)
+        else:
+            response = _django_file_response(request, field_file, size, content_type, etag, last_modified)
+            if response.status_code == 416:
+                return response
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, public=True, max_age=settings.VIDEO_CACHE_MAX_AGE)
+    return response
+
+
+def _django_file_response(request, field_file, size, content_type, etag, last_modified):
+    byte_range = None
+    if request.method == 'GET' and if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return FileResponse(field_file.storage.open(field_file.name, 'rb'), content_type=content_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        iter_file_range(field_file.storage.open(field_file.name, 'rb'), start, length),
+        status=206, content_type=content_type,
+    )
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -1,4 +1,8 @@
 from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from src.core.images import IMAGE_VARIANT_FORMATS, get_image_variants
 
 register = template.Library()
 
@@ -12,3 +16,33 @@ def relative_url(value, field_name, urlencode=None):
         encoded_querystring = '&'.join(filtered_querystring)
         url = '{}&{}'.format(url, encoded_querystring)
     return url
+
+
+@register.simple_tag
+def responsive_image(field_file, sizes='100vw', **attrs):
+    """
+    Render an uploaded image as a <picture> with width-bucketed WebP and JPEG srcsets, falling
+    back to the original file when no variants can be built.
+    e.g. {% responsive_image course.image sizes="(max-width: 767px) 100vw, 33vw" alt=course.title %}
+    """
+    if not field_file:
+        return ''
+    attributes = flatatt({'loading': 'lazy', 'decoding': 'async', **attrs})
+    manifest = get_image_variants(field_file)
+    if manifest is None:
+        return format_html('<img src="{}"{}>', field_file.url, attributes)
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((IMAGE_VARIANT_FORMATS[extension][1], _srcset(variants), sizes)
+         for extension, variants in manifest['variants'].items() if extension != 'jpg')
+    )
+    fallback = manifest['variants']['jpg']
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        sources, fallback[-1][1], _srcset(fallback), sizes, attributes
+    )
+
+
+def _srcset(variants):
+    return ', '.join(f'{url} {width}w' for width, url in variants)
@@ -0,0 +1,38 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import bll
+from .checks import check_shared_cache
+from .models import Application
+
+
+class CachedApplicationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        bll.invalidate_application_cache()
+
+    @override_settings(APPLICATION_CACHE_TIMEOUT=60)
+    def test_process_copy_is_refetched_after_the_timeout(self):
+        application = bll.get_cached_application()
+        # a save in another worker whose version bump never reached this process's cache
+        Application.objects.filter(pk=application.pk).update(name='Renamed')
+
+        with self.assertNumQueries(0):
+            self.assertIs(bll.get_cached_application(), application)
+        with mock.patch('src.core.bll.time.monotonic', return_value=bll._application_cache[2] + 61):
+            self.assertEqual(bll.get_cached_application().name, 'Renamed')
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    def test_process_local_cache_fails_on_the_server(self):
+        with override_settings(ENVIRONMENT='server', CACHES=self.locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001'])
+
+    def test_process_local_cache_is_fine_locally(self):
+        with override_settings(ENVIRONMENT='local', CACHES=self.locmem):
+            self.assertEqual(check_shared_cache(None), [])
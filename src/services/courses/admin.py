@@ -1,14 +1,28 @@
-from django.contrib import admin
+import csv
+import io
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
 from django.utils.html import format_html
-from django.urls import path
-from django.shortcuts import render
-from django.http import HttpResponse
-from django.db.models import Count, Q, Sum
+from django.urls import path, reverse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import FileResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_POST
+from django.db.models import Avg, Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
-import xlsxwriter
-import io
-from .models import Course, Instructor, CurriculumSection, Lesson, Enrollment, PricingPlan
+from src.core.pagination import ApproximateCountPaginator
+from .bll import (
+    get_enrollment_trend, get_enrollments_since, get_month_start, get_total_revenue, import_enrollments, iter_csv_emails
+)
+from .forms import EnrollmentImportForm
+from .exports import XLSX_CONTENT_TYPE, build_courses_workbook, iter_enrollments_csv, request_report_export
+from .models import (
+    Course, CourseRevenueSummary, Instructor, CurriculumSection, Lesson, Enrollment, PricingPlan, ReportExport,
+    REPORT_KIND_CHOICES
+)
 
 
 @admin.register(Instructor)
@@ -30,6 +44,9 @@ class InstructorAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_courses_count=Count('courses'))
+    
     def save_model(self, request, obj, form, change):
         # Hash password if it's being set or changed
         if 'password' in form.changed_data or not change:
@@ -37,12 +54,14 @@ class InstructorAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
     
     def courses_count(self, obj):
-        return obj.courses.count()
+        return obj._courses_count
     courses_count.short_description = 'Courses'
+    courses_count.admin_order_field = '_courses_count'
     
     def total_students(self, obj):
-        return Enrollment.objects.filter(course__instructor=obj).count()
+        return obj.enrollment_count
     total_students.short_description = 'Total Students'
+    total_students.admin_order_field = 'enrollment_count'
     
     def image_preview(self, obj):
         if obj.image:
@@ -53,49 +72,123 @@ class InstructorAdmin(admin.ModelAdmin):
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ('title', 'instructor', 'price', 'lessons_count', 'enrollment_count', 'revenue', 'image_preview')
-    list_filter = ('instructor', 'is_trial_available')
+    list_display = ('title', 'instructor', 'price_display', 'lessons_count', 'enrollment_count', 'revenue', 'image_preview')
+    list_filter = ('instructor', 'billing_interval', 'is_trial_available')
     search_fields = ('title', 'description', 'overview')
+    list_select_related = ('instructor',)
     readonly_fields = ('image_preview', 'enrollment_count', 'revenue')
+    actions = ['import_enrollments_action']
     fieldsets = (
         ('Basic Information', {
             'fields': ('title', 'image', 'image_preview', 'description', 'overview')
         }),
         ('Pricing & Lessons', {
-            'fields': ('price', 'lessons_count')
+            'fields': ('amount', 'currency', 'billing_interval', 'lessons_count')
         }),
         ('Instructor & Trial', {
             'fields': ('instructor', 'is_trial_available', 'trial_days')
         }),
     )
     
-    def enrollment_count(self, obj):
-        return obj.enrollment_set.count()
-    enrollment_count.short_description = 'Enrollments'
+    def get_urls(self):
+        custom_urls = [
+            path('<int:course_id>/import-enrollments/', self.admin_site.admin_view(self.import_enrollments_view),
+                 name='courses_course_import_enrollments'),
+        ]
+        return custom_urls + super().get_urls()
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_revenue=ExpressionWrapper(
+            Coalesce(F('amount'), Value(0), output_field=DecimalField()) * F('enrollment_count'),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        ))
+    
+    def price_display(self, obj):
+        return obj.price_display
+    price_display.short_description = 'Price'
+    price_display.admin_order_field = 'amount'
     
     def revenue(self, obj):
-        try:
-            price_value = float(str(obj.price).replace('$','').strip())
-        except (TypeError, ValueError):
-            price_value = 0.0
-        total = obj.enrollment_set.count() * price_value
+        total = (obj.amount or 0) * obj.enrollment_count
         return f"${total:.2f}"
     revenue.short_description = 'Revenue'
+    revenue.admin_order_field = '_revenue'
     
     def image_preview(self, obj):
         if obj.image:
             return format_html('<img src="{}" style="max-height: 100px; max-width: 100px; border-radius: 8px;" />', obj.image.url)
         return "No Image"
     image_preview.short_description = 'Image'
+    
+    def import_enrollments_action(self, request, queryset):
+        course_ids = list(queryset.values_list('pk', flat=True)[:2])
+        if len(course_ids) != 1:
+            self.message_user(request, 'Select exactly one course to import enrollments into.', messages.WARNING)
+            return None
+        return redirect(f'{self.admin_site.name}:courses_course_import_enrollments', course_id=course_ids[0])
+    import_enrollments_action.short_description = 'Import enrollments from a CSV of e-mails'
+    
+    def import_enrollments_view(self, request, course_id):
+        if not request.user.has_perm('courses.add_enrollment'):
+            raise PermissionDenied
+        request.current_app = self.admin_site.name
+        course = get_object_or_404(Course, pk=course_id)
+        form = EnrollmentImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            # stream the upload; large files are spooled to disk by the upload handler
+            lines = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            try:
+                result = import_enrollments(course, iter_csv_emails(lines), is_trial=form.cleaned_data['is_trial'])
+            except (UnicodeDecodeError, csv.Error) as error:
+                # the import runs in one transaction, so nothing was enrolled
+                form.add_error('csv_file', f'Could not read the file as a UTF-8 CSV ({error}). Save it as "CSV UTF-8" and retry.')
+            else:
+                self.message_user(request, (
+                    f"Enrolled {result.created} users in {course.title}; "
+                    f"{result.skipped} were already enrolled and {result.unknown} addresses matched no user."
+                ), messages.SUCCESS)
+                return redirect(f'{self.admin_site.name}:courses_course_changelist')
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Import enrollments into {course.title}',
+            'opts': self.model._meta,
+            'course': course,
+            'form': form,
+        }
+        return render(request, 'admin/courses/import_enrollments.html', context)
+
+
+class TrialStatusFilter(admin.SimpleListFilter):
+    title = 'trial status'
+    parameter_name = 'trial_status'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('active', 'Active trial'),
+            ('expired', 'Expired trial'),
+            ('full', 'Full course'),
+        )
+
+    def queryset(self, request, queryset):
+        # range conditions on the indexed trial_ends_at column
+        if self.value() == 'active':
+            return queryset.filter(is_trial=True, trial_ends_at__gt=timezone.now())
+        if self.value() == 'expired':
+            return queryset.filter(is_trial=True, trial_ends_at__lte=timezone.now())
+        if self.value() == 'full':
+            return queryset.filter(is_trial=False)
+        return queryset
 
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ('user', 'course', 'enrolled_on', 'is_trial', 'trial_status', 'days_enrolled')
-    list_filter = ('is_trial', 'enrolled_on', 'course__instructor')
+    list_filter = (TrialStatusFilter, 'is_trial', 'enrolled_on', 'course__instructor')
     search_fields = ('user__username', 'user__email', 'course__title')
-    readonly_fields = ('days_enrolled', 'trial_status')
+    readonly_fields = ('days_enrolled', 'trial_status', 'trial_expired_at')
     date_hierarchy = 'enrolled_on'
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
     
     def trial_status(self, obj):
         if obj.is_trial:
@@ -105,6 +198,7 @@ class EnrollmentAdmin(admin.ModelAdmin):
                 return format_html('<span style="color: green;">Active</span>')
         return "Full Course"
     trial_status.short_description = 'Trial Status'
+    trial_status.admin_order_field = 'trial_ends_at'
     
     def days_enrolled(self, obj):
         days = (timezone.now() - obj.enrolled_on).days
@@ -118,9 +212,13 @@ class CurriculumSectionAdmin(admin.ModelAdmin):
     list_filter = ('course',)
     search_fields = ('title', 'course__title')
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_lessons_count=Count('lessons'))
+    
     def lessons_count(self, obj):
-        return obj.lessons.count()
+        return obj._lessons_count
     lessons_count.short_description = 'Lessons'
+    lessons_count.admin_order_field = '_lessons_count'
 
 
 @admin.register(Lesson)
@@ -128,10 +226,12 @@ class LessonAdmin(admin.ModelAdmin):
     list_display = ('title', 'section', 'course', 'is_preview_available')
     list_filter = ('is_preview_available', 'section__course')
     search_fields = ('title', 'content', 'section__title')
+    list_select_related = ('section__course',)
     
     def course(self, obj):
         return obj.section.course.title
     course.short_description = 'Course'
+    course.admin_order_field = 'section__course__title'
 
 
 class PricingPlanAdmin(admin.ModelAdmin):
@@ -163,6 +263,11 @@ class CoursesAdminSite(admin.AdminSite):
         custom_urls = [
             path('dashboard/', self.admin_view(self.dashboard_view), name='courses_dashboard'),
             path('export-excel/', self.admin_view(self.export_excel), name='export_excel'),
+            path('export-csv/', self.admin_view(self.export_csv), name='export_csv'),
+            path('reports/request/', self.admin_view(self.request_report), name='request_report'),
+            path('reports/<int:report_id>/', self.admin_view(self.report_view), name='report'),
+            path('reports/<int:report_id>/status/', self.admin_view(self.report_status), name='report_status'),
+            path('reports/<int:report_id>/download/', self.admin_view(self.report_download), name='report_download'),
             path('statistics/', self.admin_view(self.statistics_view), name='statistics'),
         ]
         return custom_urls + urls
@@ -172,28 +277,17 @@ class CoursesAdminSite(admin.AdminSite):
         total_courses = Course.objects.count()
         total_instructors = Instructor.objects.count()
         total_enrollments = Enrollment.objects.count()
-        def parse_price(p):
-            try:
-                return float(str(p).replace('$','').strip())
-            except (TypeError, ValueError):
-                return 0.0
-        total_revenue = sum(parse_price(course.price) * course.enrollment_set.count() for course in Course.objects.all())
+        total_revenue = get_total_revenue()
         
         # Recent enrollments
         recent_enrollments = Enrollment.objects.select_related('user', 'course').order_by('-enrolled_on')[:10]
         
         # Top courses by enrollment
-        top_courses = Course.objects.annotate(
-            enrollment_count=Count('enrollment')
-        ).order_by('-enrollment_count')[:5]
+        top_courses = Course.objects.order_by('-enrollment_count')[:5]
         
-        # Monthly enrollment trend
-        current_month = timezone.now().month
-        current_year = timezone.now().year
-        monthly_enrollments = Enrollment.objects.filter(
-            enrolled_on__year=current_year,
-            enrolled_on__month=current_month
-        ).count()
+        # Monthly enrollment trend, read from the daily rollup
+        enrollment_trend = get_enrollment_trend(12)
+        monthly_enrollments = enrollment_trend[-1]['enrollment_count']
         
         # Trial vs Full enrollments
         trial_enrollments = Enrollment.objects.filter(is_trial=True).count()
@@ -207,6 +301,8 @@ class CoursesAdminSite(admin.AdminSite):
             'recent_enrollments': recent_enrollments,
             'top_courses': top_courses,
             'monthly_enrollments': monthly_enrollments,
+            'enrollment_trend': enrollment_trend,
+            'enrollment_trend_peak': max(month['enrollment_count'] for month in enrollment_trend),
             'trial_enrollments': trial_enrollments,
             'full_enrollments': full_enrollments,
         }
@@ -214,96 +310,47 @@ class CoursesAdminSite(admin.AdminSite):
         return render(request, 'admin/courses/dashboard.html', context)
     
     def export_excel(self, request):
-        # Create Excel file
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        
-        # Add formats
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4CAF50',
-            'font_color': 'white',
-            'border': 1
-        })
-        
-        # Courses Sheet
-        courses_sheet = workbook.add_worksheet('Courses')
-        courses_data = Course.objects.select_related('instructor').all()
-        
-        # Headers
-        headers = ['Title', 'Instructor', 'Price', 'Lessons', 'Enrollments', 'Revenue']
-        for col, header in enumerate(headers):
-            courses_sheet.write(0, col, header, header_format)
-        
-        # Data
-        for row, course in enumerate(courses_data, 1):
-            enrollment_count = course.enrollment_set.count()
-            revenue = enrollment_count * course.price
-            courses_sheet.write(row, 0, course.title)
-            courses_sheet.write(row, 1, course.instructor.name)
-            # Write price as string; also try numeric for safety
-            courses_sheet.write(row, 2, str(course.price))
-            courses_sheet.write(row, 3, course.lessons_count)
-            courses_sheet.write(row, 4, enrollment_count)
-            courses_sheet.write(row, 5, float(revenue))
-        
-        # Enrollments Sheet
-        enrollments_sheet = workbook.add_worksheet('Enrollments')
-        enrollments_data = Enrollment.objects.select_related('user', 'course').all()
-        
-        # Headers
-        headers = ['Student', 'Email', 'Course', 'Enrolled Date', 'Trial', 'Days Enrolled']
-        for col, header in enumerate(headers):
-            enrollments_sheet.write(0, col, header, header_format)
-        
-        # Data
-        for row, enrollment in enumerate(enrollments_data, 1):
-            days_enrolled = (timezone.now() - enrollment.enrolled_on).days
-            enrollments_sheet.write(row, 0, enrollment.user.username)
-            enrollments_sheet.write(row, 1, enrollment.user.email)
-            enrollments_sheet.write(row, 2, enrollment.course.title)
-            enrollments_sheet.write(row, 3, enrollment.enrolled_on.strftime('%Y-%m-%d'))
-            enrollments_sheet.write(row, 4, 'Yes' if enrollment.is_trial else 'No')
-            enrollments_sheet.write(row, 5, days_enrolled)
-        
-        # Statistics Sheet
-        stats_sheet = workbook.add_worksheet('Statistics')
-        
-        # Calculate statistics
-        total_courses = Course.objects.count()
-        total_enrollments = Enrollment.objects.count()
-        total_revenue = sum(parse_price(course.price) * course.enrollment_set.count() for course in Course.objects.all())
-        trial_enrollments = Enrollment.objects.filter(is_trial=True).count()
-        full_enrollments = Enrollment.objects.filter(is_trial=False).count()
-        
-        stats_data = [
-            ['Metric', 'Value'],
-            ['Total Courses', total_courses],
-            ['Total Enrollments', total_enrollments],
-            ['Total Revenue', f"${total_revenue:.2f}"],
-            ['Trial Enrollments', trial_enrollments],
-            ['Full Enrollments', full_enrollments],
-            ['Average Revenue per Course', f"${total_revenue/total_courses:.2f}" if total_courses > 0 else "$0.00"],
-        ]
-        
-        for row, (metric, value) in enumerate(stats_data):
-            if row == 0:
-                enrollments_sheet.write(row, 0, metric, header_format)
-                enrollments_sheet.write(row, 1, value, header_format)
-            else:
-                enrollments_sheet.write(row, 0, metric)
-                enrollments_sheet.write(row, 1, value)
-        
-        workbook.close()
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return FileResponse(
+            build_courses_workbook(),
+            as_attachment=True,
+            filename='courses_report.xlsx',
+            content_type=XLSX_CONTENT_TYPE,
         )
-        response['Content-Disposition'] = 'attachment; filename="courses_report.xlsx"'
+    
+    def export_csv(self, request):
+        response = StreamingHttpResponse(iter_enrollments_csv(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="enrollments_report.csv"'
         return response
     
+    @method_decorator(require_POST)
+    def request_report(self, request):
+        kind = request.POST.get('kind')
+        if kind not in dict(REPORT_KIND_CHOICES):
+            return HttpResponseBadRequest('Unknown report kind')
+        report = request_report_export(kind, user=request.user)
+        return redirect(f'{self.name}:report', report_id=report.pk)
+    
+    def report_view(self, request, report_id):
+        report = get_object_or_404(ReportExport, pk=report_id)
+        context = {
+            **self.each_context(request),
+            'title': report.get_kind_display(),
+            'report': report,
+        }
+        return render(request, 'admin/courses/report.html', context)
+    
+    def report_status(self, request, report_id):
+        report = get_object_or_404(ReportExport, pk=report_id)
+        return JsonResponse({
+            'status': report.status,
+            'error': report.error,
+            'download_url': reverse(f'{self.name}:report_download', args=[report.pk]) if report.status == 'done' else None,
+        })
+    
+    def report_download(self, request, report_id):
+        report = get_object_or_404(ReportExport, pk=report_id, status='done')
+        return FileResponse(report.file.open('rb'), as_attachment=True, filename=report.file.name.rsplit('/', 1)[-1])
+    
     def statistics_view(self, request):
         # Detailed statistics
         context = {
@@ -311,6 +358,7 @@ class CoursesAdminSite(admin.AdminSite):
             'enrollment_stats': self.get_enrollment_statistics(),
             'revenue_stats': self.get_revenue_statistics(),
             'instructor_stats': self.get_instructor_statistics(),
+            'enrollment_trend': get_enrollment_trend(24),
         }
         return render(request, 'admin/courses/statistics.html', context)
     
@@ -318,7 +366,7 @@ class CoursesAdminSite(admin.AdminSite):
         return {
             'total_courses': Course.objects.count(),
             'active_courses': Course.objects.filter(enrollment__isnull=False).distinct().count(),
-            'avg_price': 0,  # price is string now; skip DB average
+            'avg_price': Course.objects.filter(amount__isnull=False).aggregate(avg=Avg('amount'))['avg'] or 0,
             'total_lessons': sum(course.lessons_count for course in Course.objects.all()),
         }
     
@@ -327,16 +375,15 @@ class CoursesAdminSite(admin.AdminSite):
             'total_enrollments': Enrollment.objects.count(),
             'trial_enrollments': Enrollment.objects.filter(is_trial=True).count(),
             'full_enrollments': Enrollment.objects.filter(is_trial=False).count(),
-            'this_month': Enrollment.objects.filter(
-                enrolled_on__month=timezone.now().month
-            ).count(),
+            'this_month': get_enrollments_since(get_month_start()),
         }
     
     def get_revenue_statistics(self):
-        total_revenue = sum(parse_price(course.price) * course.enrollment_set.count() for course in Course.objects.all())
+        summary = CourseRevenueSummary.objects.aggregate(total=Sum('revenue'), courses=Count('pk'))
+        total_revenue = summary['total'] or 0
         return {
             'total_revenue': total_revenue,
-            'avg_revenue_per_course': total_revenue / Course.objects.count() if Course.objects.count() > 0 else 0,
+            'avg_revenue_per_course': total_revenue / summary['courses'] if summary['courses'] else 0,
             'trial_revenue': 0,  # Trials are free
             'full_revenue': total_revenue,
         }
@@ -8,4 +8,4 @@ class UsersConfig(AppConfig):
     default_auto_config = 'django.db.models.BigAutoField'
 
     def ready(self):
-        import src.services.users.signals
+        import src.services.courses.signals
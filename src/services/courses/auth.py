@@ -0,0 +1,125 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import router
+from django.utils import timezone
+
+from .models import Instructor
+
+INSTRUCTOR_SESSION_KEY = 'instructor_id'
+INSTRUCTOR_NAME_SESSION_KEY = 'instructor_name'
+INSTRUCTOR_SNAPSHOT_SESSION_KEY = 'instructor_snapshot'
+USER_TYPE_SESSION_KEY = 'user_type'
+
+# fields kept in the session snapshot; anything else is loaded on first access
+INSTRUCTOR_SNAPSHOT_FIELDS = ('id', 'name', 'title', 'bio', 'image', 'email', 'is_active')
+# bumped whenever the instructor row changes, so snapshots taken before the change are dropped
+INSTRUCTOR_VERSION_CACHE_KEY = 'courses:instructor:{}:version'
+
+
+def authenticate_instructor(email, password):
+    """
+    The active instructor with this e-mail if the password matches, else None. One query and
+    at most one hash check; an unknown address still hashes once so timing reveals nothing.
+    """
+    if not email or not password:
+        return None
+    instructor = Instructor.objects.filter(email__iexact=email.strip(), is_active=True).first()
+    if instructor is None:
+        make_password(password)
+        return None
+    return instructor if instructor.check_password(password) else None
+
+
+def get_instructor_version(instructor_id):
+    key = INSTRUCTOR_VERSION_CACHE_KEY.format(instructor_id)
+    version = cache.get(key)
+    if version is None:
+        version = bump_instructor_version(instructor_id)
+    return version
+
+
+def bump_instructor_version(instructor_id):
+    version = time.time_ns()
+    cache.set(INSTRUCTOR_VERSION_CACHE_KEY.format(instructor_id), version, None)
+    return version
+
+
+def _store_snapshot(request, instructor, version=None):
+    if settings.INSTRUCTOR_SESSION_SNAPSHOT_TIMEOUT:
+        values = {field: getattr(instructor, field) for field in INSTRUCTOR_SNAPSHOT_FIELDS}
+        values['image'] = instructor.image.name
+        request.session[INSTRUCTOR_SNAPSHOT_SESSION_KEY] = {
+            'values': values, 'stored_at': time.time(), 'version': version or get_instructor_version(instructor.pk),
+        }
+
+
+def _load_snapshot(request, instructor_id, version):
+    snapshot = request.session.get(INSTRUCTOR_SNAPSHOT_SESSION_KEY)
+    if not settings.INSTRUCTOR_SESSION_SNAPSHOT_TIMEOUT or not snapshot or snapshot['values']['id'] != instructor_id:
+        return None
+    if time.time() - snapshot['stored_at'] > settings.INSTRUCTOR_SESSION_SNAPSHOT_TIMEOUT:
+        return None
+    if snapshot.get('version') != version:
+        return None
+    # from_db expects the values in model field order; the remaining fields stay deferred
+    names = [field.attname for field in Instructor._meta.concrete_fields if field.attname in snapshot['values']]
+    return Instructor.from_db(
+        router.db_for_read(Instructor), names, [snapshot['values'][name] for name in names]
+    )
+
+
+def login_instructor(request, instructor):
+    """Start an instructor session, recording last_login without rewriting the rest of the row"""
+    request.session.cycle_key()
+    instructor.last_login = timezone.now()
+    instructor.save(update_fields=['last_login'])
+    request.session[INSTRUCTOR_SESSION_KEY] = instructor.pk
+    request.session[INSTRUCTOR_NAME_SESSION_KEY] = instructor.name
+    request.session[USER_TYPE_SESSION_KEY] = 'instructor'
+    _store_snapshot(request, instructor)
+    request._cached_instructor = instructor
+
+
+def logout_instructor(request):
+    """End the instructor session; a student logged in on the same browser stays logged in under a new key"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        for key in (INSTRUCTOR_SESSION_KEY, INSTRUCTOR_NAME_SESSION_KEY, INSTRUCTOR_SNAPSHOT_SESSION_KEY, USER_TYPE_SESSION_KEY):
+            request.session.pop(key, None)
+        request.session.cycle_key()
+    else:
+        request.session.flush()
+    request._cached_instructor = None
+
+
+def update_instructor_session(request, instructor):
+    """Refresh the session copies of the instructor's name and snapshot after a profile edit"""
+    request.session[INSTRUCTOR_NAME_SESSION_KEY] = instructor.name
+    _store_snapshot(request, instructor)
+
+
+def get_instructor(request):
+    """
+    The instructor logged in on this request, or None. Served from the session snapshot while
+    it is fresh and the instructor row has not changed since, otherwise from one query that
+    also re-checks is_active.
+    """
+    instructor_id = request.session.get(INSTRUCTOR_SESSION_KEY)
+    if instructor_id is None:
+        return None
+    if not settings.INSTRUCTOR_SESSION_SNAPSHOT_TIMEOUT:
+        version = None
+    else:
+        # read before the query, so a change committed in between invalidates what is stored
+        version = get_instructor_version(instructor_id)
+    instructor = _load_snapshot(request, instructor_id, version)
+    if instructor is None:
+        instructor = Instructor.objects.filter(pk=instructor_id, is_active=True).first()
+        if instructor is None:
+            logout_instructor(request)
+        else:
+            _store_snapshot(request, instructor, version)
+    return instructor
@@ -0,0 +1,644 @@
+import csv
+import hashlib
+import re
+from collections import Counter, namedtuple
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, Max, OuterRef, Prefetch, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Lower, TruncDate, TruncMonth
+from django.utils import timezone
+
+from src.core.bll import get_dependent_pages, invalidate_cached_pages
+from src.core.search import SEARCH_RESULT_LIMIT, is_search_available, search
+from src.services.users.models import User
+from .models import (
+    Course, CourseRevenueSummary, CurriculumSection, DailyEnrollmentRollup, Enrollment, Instructor,
+    InstructorRevenueSummary, Lesson, ENROLLMENT_COUNTER_FIELDS
+)
+
+ENROLLMENTS_PAGE_SIZE = 25
+TRIAL_EXPIRY_BATCH_SIZE = 1000
+ENROLLMENT_IMPORT_CHUNK_SIZE = 2000
+
+EnrollmentImportResult = namedtuple('EnrollmentImportResult', 'created skipped unknown')
+
+INSTRUCTOR_DASHBOARD_CACHE_KEY = 'courses:instructor:{}:dashboard'
+INSTRUCTOR_DASHBOARD_CACHE_TIMEOUT = 60 * 10
+
+# {% cache %} fragment holding the rendered curriculum of courses-details.html
+CURRICULUM_CACHE_FRAGMENT = 'course_curriculum'
+CURRICULUM_CACHE_TIMEOUT = 60 * 60 * 24
+
+PRICE_AMOUNT_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+REVENUE_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+
+def get_enrollment_deltas(is_trial, sign=1):
+    return Counter({
+        'enrollment_count': sign,
+        'trial_count': sign if is_trial else 0,
+        'full_count': 0 if is_trial else sign,
+    })
+
+
+def apply_course_deltas(course_id, deltas):
+    """
+    Shift the stored counters of a course and of its instructor in place with F() expressions,
+    so concurrent enrollment writes never overwrite each other's increments.
+    """
+    updates = {
+        field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta
+    }
+    if not updates:
+        return
+    Course.objects.filter(pk=course_id).update(**updates)
+    Instructor.objects.filter(courses__pk=course_id).update(**updates)
+
+    if deltas['enrollment_count']:
+        amount = Coalesce(
+            Subquery(Course.objects.filter(pk=course_id).values('amount')[:1]), Value(Decimal('0')),
+            output_field=REVENUE_FIELD,
+        )
+        updates['revenue'] = Greatest(
+            ExpressionWrapper(F('revenue') + amount * deltas['enrollment_count'], output_field=REVENUE_FIELD),
+            Value(Decimal('0')),
+        )
+    CourseRevenueSummary.objects.filter(course_id=course_id).update(**updates)
+    InstructorRevenueSummary.objects.filter(instructor__courses__pk=course_id).update(**updates)
+
+
+def apply_instructor_deltas(instructor_id, deltas):
+    updates = {
+        field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta
+    }
+    if instructor_id is None or not updates:
+        return
+    Instructor.objects.filter(pk=instructor_id).update(**updates)
+
+
+def apply_rollup_deltas(course_id, enrolled_on, deltas):
+    """Shift the daily rollup row of the enrollment's local calendar day, creating it on first use"""
+    updates = {
+        field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta
+    }
+    if enrolled_on is None or not updates:
+        return
+    day = timezone.localdate(enrolled_on)
+    rollups = DailyEnrollmentRollup.objects.filter(course_id=course_id, date=day)
+    # a decrement of a missing row has nothing to undo, and creating it could race a cascading course delete
+    if rollups.update(**updates) or not any(delta > 0 for delta in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            DailyEnrollmentRollup.objects.create(
+                course_id=course_id, date=day,
+                **{field: max(delta, 0) for field, delta in deltas.items()}
+            )
+    except IntegrityError:
+        # a concurrent enrollment created the row first
+        rollups.update(**updates)
+
+
+def enrollment_created(course_id, is_trial, enrolled_on):
+    deltas = get_enrollment_deltas(is_trial)
+    apply_course_deltas(course_id, deltas)
+    apply_rollup_deltas(course_id, enrolled_on, deltas)
+
+
+def enrollment_deleted(course_id, is_trial, enrolled_on):
+    deltas = get_enrollment_deltas(is_trial, sign=-1)
+    apply_course_deltas(course_id, deltas)
+    apply_rollup_deltas(course_id, enrolled_on, deltas)
+
+
+def enrollment_changed(old_course_id, old_is_trial, new_course_id, new_is_trial, enrolled_on):
+    if (old_course_id, old_is_trial) == (new_course_id, new_is_trial):
+        return
+    if old_course_id == new_course_id:
+        deltas = get_enrollment_deltas(new_is_trial)
+        deltas.subtract(get_enrollment_deltas(old_is_trial))
+        apply_course_deltas(new_course_id, deltas)
+        apply_rollup_deltas(new_course_id, enrolled_on, deltas)
+        return
+    enrollment_deleted(old_course_id, old_is_trial, enrolled_on)
+    enrollment_created(new_course_id, new_is_trial, enrolled_on)
+
+
+def course_instructor_changed(course_id, old_instructor_id, new_instructor_id):
+    counters = Course.objects.filter(pk=course_id).values(*ENROLLMENT_COUNTER_FIELDS).first()
+    if not counters:
+        return
+    apply_instructor_deltas(old_instructor_id, Counter({field: -value for field, value in counters.items()}))
+    apply_instructor_deltas(new_instructor_id, Counter(counters))
+
+
+def _enrollment_count_subquery(outer_field, **filters):
+    counts = Enrollment.objects.filter(**{outer_field: OuterRef('pk')}, **filters).order_by().values(
+        outer_field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _recount(model, outer_field):
+    actual = {
+        'enrollment_count': _enrollment_count_subquery(outer_field),
+        'trial_count': _enrollment_count_subquery(outer_field, is_trial=True),
+        'full_count': _enrollment_count_subquery(outer_field, is_trial=False),
+    }
+    drifted = model.objects.annotate(
+        actual_enrollment_count=actual['enrollment_count'],
+        actual_trial_count=actual['trial_count'],
+        actual_full_count=actual['full_count'],
+    ).filter(
+        ~Q(enrollment_count=F('actual_enrollment_count')) |
+        ~Q(trial_count=F('actual_trial_count')) |
+        ~Q(full_count=F('actual_full_count'))
+    ).values_list('pk', flat=True)
+    drifted_ids = list(drifted)
+    if drifted_ids:
+        model.objects.filter(pk__in=drifted_ids).update(**actual)
+    return len(drifted_ids)
+
+
+def recount_enrollment_counters():
+    """
+    Recompute every stored counter from the Enrollment table in one UPDATE per model.
+    Returns the number of courses and instructors whose counters had drifted.
+    """
+    with transaction.atomic():
+        courses_fixed = _recount(Course, 'course')
+        instructors_fixed = _recount(Instructor, 'course__instructor')
+    return courses_fixed, instructors_fixed
+
+
+def parse_course_price(label):
+    """
+    Translate a legacy free-text price such as "49/mo", "Free" or "99 one-time"
+    into an (amount, billing_interval) pair.
+    """
+    text = str(label or '').strip().lower()
+    match = PRICE_AMOUNT_PATTERN.search(text.replace(',', ''))
+    if not text or text == 'free':
+        return Decimal('0'), 'free'
+    if match is None:
+        return None, 'custom'
+    try:
+        amount = Decimal(match.group())
+    except InvalidOperation:
+        return None, 'custom'
+    if amount == 0:
+        return amount, 'free'
+    if '/mo' in text or 'month' in text:
+        return amount, 'monthly'
+    if '/yr' in text or 'year' in text:
+        return amount, 'yearly'
+    return amount, 'one_time'
+
+
+def backfill_course_pricing(overwrite=False):
+    """
+    Fill amount and billing_interval from the legacy price label. Only courses that
+    have not been priced yet are touched unless overwrite is set.
+    """
+    courses = Course.objects.exclude(price='')
+    if not overwrite:
+        courses = courses.filter(amount__isnull=True).exclude(billing_interval='custom')
+    updated = []
+    for course in courses.only('pk', 'price').iterator():
+        course.amount, course.billing_interval = parse_course_price(course.price)
+        updated.append(course)
+    Course.objects.bulk_update(updated, ['amount', 'billing_interval'], batch_size=500)
+    return len(updated)
+
+
+def get_total_revenue():
+    return CourseRevenueSummary.objects.aggregate(total=Sum('revenue'))['total'] or Decimal('0')
+
+
+def refresh_course_revenue_summary(course_id, *instructor_ids):
+    """
+    Rewrite the summary row of one course from its stored counters and re-roll the
+    summaries of its current and any previous instructors. The course row is locked first:
+    apply_course_deltas() updates the course before its summary, so a concurrent enrollment
+    either commits before the counters are read here or queues until this write commits.
+    """
+    with transaction.atomic():
+        course = Course.objects.select_for_update().filter(pk=course_id).only(
+            'instructor_id', 'amount', *ENROLLMENT_COUNTER_FIELDS
+        ).first()
+        if course is not None:
+            CourseRevenueSummary.objects.update_or_create(course_id=course_id, defaults={
+                'instructor_id': course.instructor_id,
+                'enrollment_count': course.enrollment_count,
+                'trial_count': course.trial_count,
+                'full_count': course.full_count,
+                'revenue': (course.amount or 0) * course.enrollment_count,
+            })
+            instructor_ids += (course.instructor_id,)
+        refresh_instructor_revenue_summaries(*instructor_ids)
+
+
+def _instructor_summary_totals(summaries):
+    return summaries.order_by().values('instructor').annotate(
+        course_count=Count('pk'),
+        enrollment_count=Sum('enrollment_count'),
+        trial_count=Sum('trial_count'),
+        full_count=Sum('full_count'),
+        revenue=Sum('revenue'),
+    )
+
+
+def refresh_instructor_revenue_summaries(*instructor_ids):
+    instructor_ids = {pk for pk in instructor_ids if pk is not None}
+    if not instructor_ids:
+        return
+    with transaction.atomic():
+        # the instructor rows are locked before the course summaries are summed, for the same reason as above
+        locked = Instructor.objects.select_for_update().filter(pk__in=instructor_ids).order_by('pk')
+        locked_ids = list(locked.values_list('pk', flat=True))
+        totals = {
+            row.pop('instructor'): row
+            for row in _instructor_summary_totals(CourseRevenueSummary.objects.filter(instructor__in=locked_ids))
+        }
+        for instructor_id in locked_ids:
+            InstructorRevenueSummary.objects.update_or_create(instructor_id=instructor_id, defaults=totals.get(
+                instructor_id,
+                {'course_count': 0, 'enrollment_count': 0, 'trial_count': 0, 'full_count': 0, 'revenue': 0},
+            ))
+
+
+def rebuild_revenue_summaries():
+    """
+    Recompute every summary row straight from the Enrollment table.
+    Returns the number of course and instructor rows written.
+    """
+    courses = Course.objects.annotate(
+        actual_enrollment_count=_enrollment_count_subquery('course'),
+        actual_trial_count=_enrollment_count_subquery('course', is_trial=True),
+        actual_full_count=_enrollment_count_subquery('course', is_trial=False),
+    ).values_list(
+        'pk', 'instructor_id', 'amount', 'actual_enrollment_count', 'actual_trial_count', 'actual_full_count'
+    )
+    with transaction.atomic():
+        # block enrollment deltas until the new rows are committed, so none lands on a row being replaced
+        list(Course.objects.select_for_update().values_list('pk', flat=True))
+        CourseRevenueSummary.objects.all().delete()
+        course_summaries = CourseRevenueSummary.objects.bulk_create((
+            CourseRevenueSummary(
+                course_id=pk, instructor_id=instructor_id, enrollment_count=total, trial_count=trial,
+                full_count=full, revenue=(amount or 0) * total,
+            ) for pk, instructor_id, amount, total, trial, full in courses.iterator()
+        ), batch_size=500)
+
+        totals = {
+            row.pop('instructor'): row
+            for row in _instructor_summary_totals(CourseRevenueSummary.objects.filter(instructor__isnull=False))
+        }
+        InstructorRevenueSummary.objects.all().delete()
+        instructor_summaries = InstructorRevenueSummary.objects.bulk_create((
+            InstructorRevenueSummary(instructor_id=pk, **totals.get(pk, {}))
+            for pk in Instructor.objects.values_list('pk', flat=True).iterator()
+        ), batch_size=500)
+    return len(course_summaries), len(instructor_summaries)
+
+
+def get_instructor_dashboard(instructor):
+    """
+    Statistics, top courses and recent enrollments for the instructor dashboard,
+    cached per instructor until one of their enrollments or courses changes.
+    """
+    key = INSTRUCTOR_DASHBOARD_CACHE_KEY.format(instructor.pk)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        dashboard = build_instructor_dashboard(instructor)
+        cache.set(key, dashboard, INSTRUCTOR_DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
+
+
+def get_instructor_statistics(courses):
+    # one conditional aggregate over the course/enrollment join; each joined enrollment row adds its course amount
+    return courses.aggregate(
+        total_courses=Count('pk', distinct=True),
+        total_enrollments=Count('enrollment'),
+        trial_enrollments=Count('enrollment', filter=Q(enrollment__is_trial=True)),
+        full_enrollments=Count('enrollment', filter=Q(enrollment__is_trial=False)),
+        total_revenue=Coalesce(
+            Sum('amount', filter=Q(enrollment__isnull=False)), Decimal('0'), output_field=REVENUE_FIELD,
+        ),
+    )
+
+
+def build_instructor_dashboard(instructor):
+    courses = Course.objects.filter(instructor=instructor)
+    summary = InstructorRevenueSummary.objects.filter(instructor=instructor).first()
+    if summary is not None:
+        stats = {
+            'total_courses': summary.course_count,
+            'total_enrollments': summary.enrollment_count,
+            'trial_enrollments': summary.trial_count,
+            'full_enrollments': summary.full_count,
+            'total_revenue': summary.revenue,
+        }
+    else:
+        stats = get_instructor_statistics(courses)
+
+    return {
+        **stats,
+        'top_courses': list(courses.order_by('-enrollment_count')[:5]),
+        'recent_enrollments': list(
+            Enrollment.objects.filter(course__instructor=instructor).select_related(
+                'user', 'course'
+            ).order_by('-enrolled_on')[:10]
+        ),
+    }
+
+
+def invalidate_instructor_dashboard(*instructor_ids):
+    keys = [INSTRUCTOR_DASHBOARD_CACHE_KEY.format(pk) for pk in set(instructor_ids) if pk is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_course_dashboards(*course_ids):
+    instructor_ids = Course.objects.filter(pk__in=set(course_ids)).values_list('instructor_id', flat=True)
+    invalidate_instructor_dashboard(*instructor_ids)
+
+
+def get_course_curriculum(course):
+    """
+    Lazy queryset of the course sections with their lessons; when iterated it costs two
+    queries regardless of the number of sections, and nothing at all on a fragment cache hit.
+    """
+    lessons = Lesson.objects.only('section_id', 'title', 'is_preview_available')
+    return CurriculumSection.objects.filter(course=course).prefetch_related(Prefetch('lessons', queryset=lessons))
+
+
+def invalidate_course_curriculum(*course_ids):
+    keys = [make_template_fragment_key(CURRICULUM_CACHE_FRAGMENT, [pk]) for pk in set(course_ids) if pk is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _latest(*timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+def get_catalog_validators():
+    """
+    Return (etag parts, last modified) for the course catalog from one query. The per-course
+    counters are hashed rather than summed, so enrollments moved between courses and deletions,
+    neither of which touches updated_at, still change the ETag.
+    """
+    rows = list(Course.objects.order_by('pk').values_list(
+        'pk', 'updated_at', 'instructor__updated_at', *ENROLLMENT_COUNTER_FIELDS
+    ))
+    digest = hashlib.md5(repr(rows).encode('utf-8')).hexdigest()
+    last_modified = _latest(*(row[1] for row in rows), *(row[2] for row in rows))
+    return (len(rows), digest), last_modified
+
+
+def get_course_validators(course_id):
+    """Return (etag parts, last modified) for a course detail page, or None if the course does not exist"""
+    course = Course.objects.filter(pk=course_id).annotate(
+        instructor_modified=Max('instructor__updated_at'),
+        sections_modified=Max('sections__updated_at'),
+        lessons_modified=Max('sections__lessons__updated_at'),
+        section_total=Count('sections', distinct=True),
+        lesson_total=Count('sections__lessons', distinct=True),
+    ).values_list(
+        'updated_at', 'instructor_modified', 'sections_modified', 'lessons_modified',
+        'section_total', 'lesson_total', 'enrollment_count',
+    ).first()
+    if course is None:
+        return None
+    return course, _latest(*course[:4])
+
+
+def search_course_ids(query):
+    """Course ids ranked by their best match, counting hits in a course's lessons as hits on the course"""
+    if not is_search_available():
+        return list(Course.objects.filter(
+            Q(title__icontains=query) | Q(description__icontains=query)
+        ).order_by('-id').values_list('pk', flat=True)[:SEARCH_RESULT_LIMIT])
+    hits = search(query, kinds=('course', 'lesson'))
+    lesson_courses = dict(Lesson.objects.filter(
+        pk__in=[object_id for kind, object_id in hits if kind == 'lesson']
+    ).values_list('pk', 'section__course_id'))
+    ranked = {}
+    for kind, object_id in hits:
+        course_id = object_id if kind == 'course' else lesson_courses.get(object_id)
+        if course_id is not None:
+            ranked.setdefault(course_id, None)
+    return list(ranked)
+
+
+def get_enrollment_counts(enrollments):
+    """Total, trial and full counts of an enrollment queryset in a single aggregate query"""
+    return enrollments.aggregate(
+        total=Count('pk'),
+        trial=Count('pk', filter=Q(is_trial=True)),
+        full=Count('pk', filter=Q(is_trial=False)),
+    )
+
+
+def get_month_start(months_ago=0):
+    """First local calendar day of the month `months_ago` months before the current one"""
+    today = timezone.localdate()
+    year, month = divmod(today.year * 12 + today.month - 1 - months_ago, 12)
+    return date(year, month + 1, 1)
+
+
+def rebuild_enrollment_rollups():
+    """
+    Recompute the daily rollup straight from the Enrollment table, grouping by the local
+    calendar day. Returns the number of rollup rows written.
+    """
+    rows = Enrollment.objects.annotate(day=TruncDate('enrolled_on')).order_by().values('course', 'day').annotate(
+        total=Count('pk'),
+        trial=Count('pk', filter=Q(is_trial=True)),
+        full=Count('pk', filter=Q(is_trial=False)),
+    )
+    with transaction.atomic():
+        DailyEnrollmentRollup.objects.all().delete()
+        rollups = DailyEnrollmentRollup.objects.bulk_create((
+            DailyEnrollmentRollup(
+                course_id=row['course'], date=row['day'], enrollment_count=row['total'],
+                trial_count=row['trial'], full_count=row['full'],
+            ) for row in rows.iterator()
+        ), batch_size=500)
+    return len(rollups)
+
+
+def get_enrollments_since(day):
+    return DailyEnrollmentRollup.objects.filter(date__gte=day).aggregate(
+        total=Sum('enrollment_count')
+    )['total'] or 0
+
+
+def get_enrollment_trend(months=12):
+    """
+    Enrollment totals per month for the last `months` months, the current one included and
+    oldest first. Months without enrollments are filled in with zeros.
+    """
+    totals = {
+        row['month']: row
+        for row in DailyEnrollmentRollup.objects.filter(date__gte=get_month_start(months - 1)).annotate(
+            month=TruncMonth('date')
+        ).order_by().values('month').annotate(
+            enrollment_count=Sum('enrollment_count'),
+            trial_count=Sum('trial_count'),
+            full_count=Sum('full_count'),
+        )
+    }
+    return [
+        totals.get(month, {'month': month, 'enrollment_count': 0, 'trial_count': 0, 'full_count': 0})
+        for month in (get_month_start(months_ago) for months_ago in range(months - 1, -1, -1))
+    ]
+
+
+def get_trial_ends_at(course, trial_started):
+    return trial_started + timedelta(days=course.trial_days) if trial_started else None
+
+
+def enroll_user(user, course):
+    """
+    Enroll a user, or hand back their existing enrollment. The happy path is a single INSERT;
+    a duplicate, including one from a concurrent retry, is rejected by the (user, course)
+    unique constraint and answered with the row that won. Returns (enrollment, created).
+    """
+    trial_started = timezone.now() if course.is_trial_available else None
+    try:
+        with transaction.atomic():
+            return Enrollment.objects.create(
+                user=user,
+                course=course,
+                is_trial=course.is_trial_available,
+                trial_started=trial_started,
+                trial_ends_at=get_trial_ends_at(course, trial_started),
+            ), True
+    except IntegrityError as error:
+        try:
+            return Enrollment.objects.get(user=user, course=course), False
+        except Enrollment.DoesNotExist:
+            # not a duplicate (e.g. a user or course deleted meanwhile), so report the real failure
+            raise error from None
+
+
+def backfill_trial_ends_at():
+    """
+    Fill trial_ends_at on trial enrollments that predate the column (or were written without
+    save(), e.g. by a raw UPDATE), one UPDATE per course. A single query when nothing is missing.
+    """
+    updated = 0
+    missing = Enrollment.objects.filter(is_trial=True, trial_started__isnull=False, trial_ends_at__isnull=True)
+    for course_id, trial_days in Course.objects.filter(
+        pk__in=missing.values('course_id')
+    ).values_list('pk', 'trial_days'):
+        updated += missing.filter(course_id=course_id).update(
+            trial_ends_at=F('trial_started') + timedelta(days=trial_days)
+        )
+    return updated
+
+
+def expire_trials(batch_size=TRIAL_EXPIRY_BATCH_SIZE):
+    """
+    Mark every trial whose trial_ends_at has passed as expired, in batches of primary keys
+    so each UPDATE stays short. Returns the number of enrollments transitioned.
+    """
+    now = timezone.now()
+    due = Enrollment.objects.filter(
+        is_trial=True, trial_expired_at__isnull=True, trial_ends_at__lte=now
+    ).order_by('trial_ends_at')
+    expired = 0
+    while True:
+        batch = list(due.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return expired
+        expired += Enrollment.objects.filter(pk__in=batch).update(trial_expired_at=now)
+
+
+def iter_csv_emails(lines):
+    """
+    Yield the lower-cased addresses of a CSV file, read lazily. The column headed "email" is
+    used when there is one, otherwise the first column.
+    """
+    column = None
+    for row in csv.reader(lines):
+        if column is None:
+            headers = [cell.strip().lower() for cell in row]
+            column = headers.index('email') if 'email' in headers else 0
+            if 'email' in headers:
+                continue
+        if len(row) > column and '@' in row[column]:
+            yield row[column].strip().lower()
+
+
+def _import_enrollment_chunk(course, emails, is_trial, batch_size):
+    # descending, so the oldest account wins when an address is registered more than once
+    users = dict(User.objects.annotate(email_lower=Lower('email')).filter(
+        email_lower__in=emails
+    ).order_by('-pk').values_list('email_lower', 'pk'))
+    trial_started = timezone.now() if is_trial else None
+    enrolled = set(Enrollment.objects.filter(course=course, user_id__in=users.values()).values_list('user_id', flat=True))
+    while True:
+        new_user_ids = set(users.values()) - enrolled
+        try:
+            # all or nothing, so the number of rows inserted is exactly len(new_user_ids)
+            with transaction.atomic():
+                Enrollment.objects.bulk_create([
+                    Enrollment(
+                        user_id=user_id, course=course, is_trial=is_trial,
+                        trial_started=trial_started, trial_ends_at=get_trial_ends_at(course, trial_started),
+                    ) for user_id in new_user_ids
+                ], batch_size=batch_size)
+        except IntegrityError:
+            # a concurrent enrollment (already counted by its own signals) took one of these users; look again
+            now_enrolled = set(Enrollment.objects.filter(
+                course=course, user_id__in=users.values()
+            ).values_list('user_id', flat=True))
+            if now_enrolled == enrolled:
+                raise
+            enrolled = now_enrolled
+            continue
+        return EnrollmentImportResult(
+            created=len(new_user_ids), skipped=len(users) - len(new_user_ids), unknown=len(emails) - len(users)
+        )
+
+
+def import_enrollments(course, emails, is_trial=False, chunk_size=ENROLLMENT_IMPORT_CHUNK_SIZE):
+    """
+    Enroll the users behind an iterable of e-mail addresses in a course. Each chunk costs one
+    IN query for the users, one for their existing enrollments and a bulk INSERT, so memory
+    stays bounded by the chunk size. bulk_create bypasses the enrollment signals, so the
+    counters, summaries and daily rollup are shifted once for the whole import instead.
+    Addresses repeated within a chunk count once.
+    """
+    totals = Counter()
+    chunk = set()
+
+    def flush():
+        totals.update(_import_enrollment_chunk(course, chunk, is_trial, chunk_size)._asdict())
+        chunk.clear()
+
+    with transaction.atomic():
+        for email in emails:
+            chunk.add(email)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+
+        if totals['created']:
+            deltas = Counter({field: delta * totals['created'] for field, delta in get_enrollment_deltas(is_trial).items()})
+            apply_course_deltas(course.pk, deltas)
+            apply_rollup_deltas(course.pk, timezone.now(), deltas)
+            pages = get_dependent_pages(Enrollment)
+            transaction.on_commit(lambda: invalidate_course_dashboards(course.pk))
+            transaction.on_commit(lambda: invalidate_cached_pages(*pages))
+    return EnrollmentImportResult(totals['created'], totals['skipped'], totals['unknown'])
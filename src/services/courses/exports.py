@@ -0,0 +1,214 @@
+import csv
+import tempfile
+from datetime import timedelta
+
+import xlsxwriter
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .bll import get_total_revenue
+from .models import Course, Enrollment, ReportExport
+
+EXPORT_CHUNK_SIZE = 2000
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# rows per worksheet, header included (Excel's limit)
+XLSX_MAX_ROWS = 1048576
+
+COURSE_HEADERS = ['Title', 'Instructor', 'Price', 'Currency', 'Billing', 'Lessons', 'Enrollments', 'Revenue']
+ENROLLMENT_HEADERS = ['Student', 'Email', 'Course', 'Enrolled Date', 'Trial', 'Days Enrolled']
+
+
+class Echo:
+    """File-like object whose write() hands the value back, for feeding csv.writer into a stream"""
+
+    def write(self, value):
+        return value
+
+
+def iter_course_rows():
+    courses = Course.objects.select_related('instructor').order_by('pk')
+    for course in courses.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            course.title,
+            course.instructor.name if course.instructor else '',
+            float(course.amount) if course.amount is not None else '',
+            course.currency,
+            course.get_billing_interval_display(),
+            course.lessons_count,
+            course.enrollment_count,
+            float((course.amount or 0) * course.enrollment_count),
+        ]
+
+
+def iter_enrollment_rows():
+    now = timezone.now()
+    enrollments = Enrollment.objects.order_by('pk').values_list(
+        'user__username', 'user__email', 'course__title', 'enrolled_on', 'is_trial'
+    )
+    for username, email, title, enrolled_on, is_trial in enrollments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            username,
+            email,
+            title,
+            enrolled_on.strftime('%Y-%m-%d'),
+            'Yes' if is_trial else 'No',
+            (now - enrolled_on).days,
+        ]
+
+
+def get_report_statistics():
+    total_courses = Course.objects.count()
+    enrollments = Enrollment.objects.aggregate(
+        total=Count('pk'),
+        trial=Count('pk', filter=Q(is_trial=True)),
+        full=Count('pk', filter=Q(is_trial=False)),
+    )
+    total_revenue = get_total_revenue()
+    return [
+        ['Metric', 'Value'],
+        ['Total Courses', total_courses],
+        ['Total Enrollments', enrollments['total']],
+        ['Total Revenue', f"${total_revenue:.2f}"],
+        ['Trial Enrollments', enrollments['trial']],
+        ['Full Enrollments', enrollments['full']],
+        ['Average Revenue per Course', f"${total_revenue/total_courses:.2f}" if total_courses > 0 else "$0.00"],
+    ]
+
+
+def _write_rows(workbook, name, headers, rows, header_format):
+    """
+    Write the rows under a header row, continuing on worksheets "<name> (2)", "<name> (3)", ...
+    whenever one is full; xlsxwriter silently ignores rows past XLSX_MAX_ROWS.
+    """
+    sheets = 1
+    sheet = workbook.add_worksheet(name)
+    sheet.write_row(0, 0, headers, header_format)
+    row = 1
+    for values in rows:
+        if row == XLSX_MAX_ROWS:
+            sheets += 1
+            sheet = workbook.add_worksheet(f'{name} ({sheets})')
+            sheet.write_row(0, 0, headers, header_format)
+            row = 1
+        sheet.write_row(row, 0, values)
+        row += 1
+
+
+def write_courses_workbook(output):
+    """
+    Write the courses report into a filename or binary file object. The workbook runs in
+    xlsxwriter's constant_memory mode, so every row is flushed to disk as soon as it is written
+    and memory stays flat no matter how many enrollments are exported.
+    """
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4CAF50',
+        'font_color': 'white',
+        'border': 1
+    })
+
+    _write_rows(workbook, 'Courses', COURSE_HEADERS, iter_course_rows(), header_format)
+    _write_rows(workbook, 'Enrollments', ENROLLMENT_HEADERS, iter_enrollment_rows(), header_format)
+
+    statistics = get_report_statistics()
+    _write_rows(workbook, 'Statistics', statistics[0], statistics[1:], header_format)
+
+    workbook.close()
+
+
+def build_courses_workbook():
+    """Return the courses report as an anonymous temporary file positioned at its start"""
+    output = tempfile.TemporaryFile()
+    write_courses_workbook(output)
+    output.seek(0)
+    return output
+
+
+def iter_enrollments_csv():
+    writer = csv.writer(Echo())
+    yield writer.writerow(ENROLLMENT_HEADERS)
+    chunk = []
+    for row in iter_enrollment_rows():
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def write_enrollments_csv(output):
+    for chunk in iter_enrollments_csv():
+        output.write(chunk.encode('utf-8'))
+
+
+REPORT_WRITERS = {
+    'xlsx': (write_courses_workbook, 'courses_report.xlsx'),
+    'csv': (write_enrollments_csv, 'enrollments_report.csv'),
+}
+
+
+def request_report_export(kind, user=None):
+    """
+    Queue a report for the worker, or hand back an identical one that was queued or
+    finished within REPORT_EXPORT_REUSE_SECONDS.
+    """
+    window_start = timezone.now() - timedelta(seconds=settings.REPORT_EXPORT_REUSE_SECONDS)
+    existing = ReportExport.objects.filter(kind=kind).filter(
+        Q(status__in=('pending', 'running'), created_at__gte=window_start) |
+        Q(status='done', finished_at__gte=window_start)
+    ).order_by('-created_at').first()
+    if existing is not None:
+        return existing
+    return ReportExport.objects.create(kind=kind, requested_by=user)
+
+
+def requeue_stale_report_exports():
+    """Put back running jobs whose worker has held them past REPORT_EXPORT_LEASE_SECONDS, e.g. after a crash"""
+    lease_start = timezone.now() - timedelta(seconds=settings.REPORT_EXPORT_LEASE_SECONDS)
+    return ReportExport.objects.filter(status='running', started_at__lt=lease_start).update(
+        status='pending', started_at=None
+    )
+
+
+def claim_report_export():
+    requeue_stale_report_exports()
+    with transaction.atomic():
+        job = ReportExport.objects.select_for_update(skip_locked=True).filter(
+            status='pending'
+        ).order_by('created_at').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def run_report_export(job):
+    """
+    Build the report and record the outcome. The result is only written while this worker still
+    holds the lease (started_at unchanged); a job re-queued and claimed elsewhere keeps its new run.
+    """
+    writer, filename = REPORT_WRITERS[job.kind]
+    try:
+        with tempfile.TemporaryFile() as output:
+            writer(output)
+            output.seek(0)
+            job.file.save(filename, File(output), save=False)
+    except Exception as error:
+        job.status = 'failed'
+        job.error = str(error)
+    else:
+        job.status = 'done'
+    job.finished_at = timezone.now()
+    finished = ReportExport.objects.filter(pk=job.pk, status='running', started_at=job.started_at).update(
+        status=job.status, file=job.file.name, error=job.error, finished_at=job.finished_at
+    )
+    if not finished and job.file:
+        job.file.delete(save=False)
+    return job
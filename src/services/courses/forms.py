@@ -0,0 +1,8 @@
+from django import forms
+
+
+class EnrollmentImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label='CSV file', help_text='A column headed "email", or the addresses in the first column'
+    )
+    is_trial = forms.BooleanField(required=False, label='Enroll as trial')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from src.services.courses.bll import backfill_course_pricing
+
+
+class Command(BaseCommand):
+    help = "Parse legacy free-text course prices into amount, currency and billing interval"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true', help='Re-parse courses that already have pricing')
+
+    def handle(self, *args, **options):
+        updated = backfill_course_pricing(overwrite=options.get('overwrite'))
+        self.stdout.write(self.style.SUCCESS(f"Backfilled pricing on {updated} courses."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from src.services.courses.bll import TRIAL_EXPIRY_BATCH_SIZE, backfill_trial_ends_at, expire_trials
+
+
+class Command(BaseCommand):
+    help = "Fill missing trial end dates, then mark trial enrollments whose trial period has ended as expired"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=TRIAL_EXPIRY_BATCH_SIZE,
+                            help='Enrollments updated per UPDATE statement')
+
+    def handle(self, *args, **options):
+        backfilled = backfill_trial_ends_at()
+        if backfilled:
+            self.stdout.write(f"Filled trial_ends_at on {backfilled} enrollments.")
+        expired = expire_trials(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} trial enrollments."))
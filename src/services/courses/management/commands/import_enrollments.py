@@ -0,0 +1,33 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.services.courses.bll import ENROLLMENT_IMPORT_CHUNK_SIZE, import_enrollments, iter_csv_emails
+from src.services.courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Enroll the users listed by e-mail in a CSV file in a course"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='CSV with an "email" column, or the addresses in the first column')
+        parser.add_argument('--course', type=int, required=True, help='Course id')
+        parser.add_argument('--trial', action='store_true', help='Create trial enrollments')
+        parser.add_argument('--chunk-size', type=int, default=ENROLLMENT_IMPORT_CHUNK_SIZE,
+                            help='Addresses resolved and inserted per batch')
+
+    def handle(self, *args, **options):
+        course = Course.objects.filter(pk=options['course']).first()
+        if course is None:
+            raise CommandError(f"Course {options['course']} does not exist.")
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as lines:
+                result = import_enrollments(
+                    course, iter_csv_emails(lines), is_trial=options['trial'], chunk_size=options['chunk_size']
+                )
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(f"Could not read {options['csv_file']} as a UTF-8 CSV: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Enrolled {result.created} users in {course.title}; "
+            f"{result.skipped} were already enrolled and {result.unknown} addresses matched no user."
+        ))
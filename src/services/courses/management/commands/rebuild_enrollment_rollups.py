@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from src.services.courses.bll import rebuild_enrollment_rollups
+
+
+class Command(BaseCommand):
+    help = "Backfill the daily per-course enrollment rollup from the enrollments table"
+
+    def handle(self, *args, **options):
+        rows = rebuild_enrollment_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily enrollment rollup rows."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from src.services.courses.bll import rebuild_revenue_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-course and per-instructor revenue summary tables from enrollments"
+
+    def handle(self, *args, **options):
+        courses, instructors = rebuild_revenue_summaries()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt revenue summaries for {courses} courses and {instructors} instructors."
+        ))
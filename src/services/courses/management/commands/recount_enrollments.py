@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from src.services.courses.bll import recount_enrollment_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored enrollment counters on courses and instructors"
+
+    def handle(self, *args, **options):
+        courses_fixed, instructors_fixed = recount_enrollment_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"Repaired counters on {courses_fixed} courses and {instructors_fixed} instructors."
+        ))
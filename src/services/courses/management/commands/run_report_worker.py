@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from src.services.courses.exports import claim_report_export, run_report_export
+
+
+class Command(BaseCommand):
+    help = "Process queued admin report exports and store the files in the private report storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_report_export()
+            if job is not None:
+                run_report_export(job)
+                style = self.style.SUCCESS if job.status == 'done' else self.style.ERROR
+                self.stdout.write(style(f"{job}: {job.error or job.file.name}"))
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -5,6 +5,7 @@ from faker import Faker
 import io
 from PIL import Image, ImageDraw
 
+from src.services.courses.bll import parse_course_price
 from src.services.courses.models import Course, Instructor
 
 
@@ -54,6 +55,7 @@ class Command(BaseCommand):
             overview = fake.paragraph(nb_sentences=8)
             lessons_count = fake.random_int(min=8, max=40)
             price = fake.random_element(elements=("Free", "19.99", "29.00", "49/mo", "99 one-time"))
+            amount, billing_interval = parse_course_price(price)
             instructor = fake.random_element(elements=instructors) if instructors else None
 
             course = Course(
@@ -62,6 +64,8 @@ class Command(BaseCommand):
                 overview=overview,
                 lessons_count=lessons_count,
                 price=str(price),
+                amount=amount,
+                billing_interval=billing_interval,
                 instructor=instructor,
                 is_trial_available=fake.boolean(chance_of_getting_true=60),
                 trial_days=fake.random_int(min=1, max=7)
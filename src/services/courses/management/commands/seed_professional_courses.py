@@ -6,6 +6,7 @@ import io
 import requests
 from PIL import Image, ImageDraw
 
+from src.services.courses.bll import parse_course_price
 from src.services.courses.models import Course, Instructor
 
 
@@ -190,12 +191,15 @@ class Command(BaseCommand):
             if image_file is None:
                 # last-resort placeholder
                 image_file = download_and_fit_image('about:blank')
+            amount, billing_interval = parse_course_price(data['price'])
             course = Course(
                 title=title,
                 description=data['description'],
                 overview=data['overview'],
                 lessons_count=data['lessons_count'],
                 price=str(data['price']),
+                amount=amount,
+                billing_interval=billing_interval,
                 instructor=instructor,
                 is_trial_available=True,
                 trial_days=3,
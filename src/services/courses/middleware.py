@@ -0,0 +1,23 @@
+from django.utils.functional import SimpleLazyObject
+
+from .auth import get_instructor
+
+
+def get_cached_instructor(request):
+    if not hasattr(request, '_cached_instructor'):
+        request._cached_instructor = get_instructor(request)
+    return request._cached_instructor
+
+
+class InstructorMiddleware:
+    """
+    Attach request.instructor, loaded on first access and memoized for the rest of the request.
+    It evaluates falsy when no instructor is logged in. Requires SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.instructor = SimpleLazyObject(lambda: get_cached_instructor(request))
+        return self.get_response(request)
@@ -1,10 +1,41 @@
+from datetime import timedelta
+
 from django.db import models
 from django.utils import timezone
-from datetime import timedelta
 from django.contrib.auth.hashers import make_password, check_password
 
+from src.core.storages import get_report_storage, report_upload_to
 from src.services.users.models import User
 
+ENROLLMENT_COUNTER_FIELDS = ('enrollment_count', 'trial_count', 'full_count')
+
+BILLING_INTERVAL_CHOICES = (
+    ('free', 'Free'),
+    ('one_time', 'One-time'),
+    ('monthly', 'Monthly'),
+    ('yearly', 'Yearly'),
+    ('custom', 'Custom / on request'),
+)
+BILLING_INTERVAL_SUFFIXES = {
+    'one_time': ' one-time',
+    'monthly': '/mo',
+    'yearly': '/yr',
+}
+
+
+def protect_enrollment_counters(instance, kwargs):
+    """
+    Leave the denormalized counters out of plain saves of an existing row, so a stale
+    in-memory copy never overwrites increments made by concurrent enrollments.
+    """
+    if instance._state.adding or kwargs.get('update_fields') is not None or kwargs.get('force_insert'):
+        return
+    kwargs['update_fields'] = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in ENROLLMENT_COUNTER_FIELDS
+    ]
+
+
 class Instructor(models.Model):
     name = models.CharField(max_length=100)
     image = models.ImageField(upload_to='instructors/')
@@ -19,13 +50,21 @@ class Instructor(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized enrollment counters rolled up from the instructor's courses
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    trial_count = models.PositiveIntegerField(default=0, editable=False)
+    full_count = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self):
         return self.name
     
     def save(self, *args, **kwargs):
-        # Hash password if it's not already hashed
-        if self.password and not self.password.startswith('pbkdf2_sha256$'):
-            self.password = make_password(self.password)
+        # Hash password if it's not already hashed (saves that leave the password out skip this)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'password' in update_fields:
+            if self.password and not self.password.startswith('pbkdf2_sha256$'):
+                self.password = make_password(self.password)
+        protect_enrollment_counters(self, kwargs)
         super().save(*args, **kwargs)
     
     def check_password(self, raw_password):
@@ -41,13 +80,13 @@ class Instructor(models.Model):
         return self.courses.count()
     
     def get_total_students(self):
-        return Enrollment.objects.filter(course__instructor=self).count()
+        return self.enrollment_count
     
     def get_active_students(self):
-        return Enrollment.objects.filter(course__instructor=self, is_trial=False).count()
+        return self.full_count
     
     def get_trial_students(self):
-        return Enrollment.objects.filter(course__instructor=self, is_trial=True).count()
+        return self.trial_count
 
 
 class Course(models.Model):
@@ -55,15 +94,54 @@ class Course(models.Model):
     image = models.ImageField(upload_to='courses/')
     description = models.TextField()
     overview = models.TextField()
-    price = models.CharField(max_length=50)
+    price = models.CharField(
+        max_length=50, blank=True,
+        help_text='Legacy free-text price, superseded by amount, currency and billing interval'
+    )
+    amount = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True, help_text='Leave empty for custom pricing'
+    )
+    currency = models.CharField(max_length=3, default='USD', help_text='ISO 4217')
+    billing_interval = models.CharField(max_length=20, choices=BILLING_INTERVAL_CHOICES, default='one_time')
     lessons_count = models.PositiveIntegerField()
     instructor = models.ForeignKey(Instructor, on_delete=models.CASCADE, related_name='courses', null=True, blank=True)
     is_trial_available = models.BooleanField(default=True)
     trial_days = models.PositiveIntegerField(default=3)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Denormalized enrollment counters, kept in sync by src.services.courses.signals
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    trial_count = models.PositiveIntegerField(default=0, editable=False)
+    full_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        protect_enrollment_counters(self, kwargs)
+        super().save(*args, **kwargs)
+
+    @property
+    def is_free(self):
+        return self.billing_interval == 'free' or self.amount == 0
+
+    @property
+    def price_display(self):
+        if self.is_free:
+            return 'Free'
+        if self.amount is None:
+            return self.price or 'Custom'
+        symbol = '$' if self.currency == 'USD' else f'{self.currency} '
+        amount = self.amount.to_integral_value() if self.amount == self.amount.to_integral_value() else self.amount
+        return f"{symbol}{amount}{BILLING_INTERVAL_SUFFIXES.get(self.billing_interval, '')}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the loaded instructor so a reassignment can move the counters
+        instance._loaded_instructor_id = instance.__dict__.get('instructor_id')
+        return instance
+
 
 class Enrollment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -71,35 +149,177 @@ class Enrollment(models.Model):
     enrolled_on = models.DateTimeField(auto_now_add=True)
     is_trial = models.BooleanField(default=False)
     trial_started = models.DateTimeField(blank=True, null=True)
+    trial_ends_at = models.DateTimeField(
+        blank=True, null=True, db_index=True, help_text='Leave empty to use the course trial days'
+    )
+    # set by the expire_trials sweeper once trial_ends_at has passed, cleared when the trial is extended
+    trial_expired_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course'], name='enrollment_unique_user_course'),
+        ]
+        indexes = [
+            # keyset pagination of enrollment listings, newest first
+            models.Index(fields=['course', 'enrolled_on', 'id'], name='enrollment_course_keyset'),
+            models.Index(fields=['enrolled_on', 'id'], name='enrollment_keyset'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the loaded state so counter signals can detect trial conversions
+        instance._loaded_course_id = instance.__dict__.get('course_id')
+        instance._loaded_is_trial = instance.__dict__.get('is_trial')
+        return instance
+
+    def save(self, *args, **kwargs):
+        changed = []
+        # trials created outside enroll_user (the admin, the shell) get their end date here
+        if self.is_trial and self.trial_ends_at is None:
+            self.trial_started = self.trial_started or timezone.now()
+            self.trial_ends_at = self.trial_started + timedelta(days=self.course.trial_days)
+            changed += ['trial_started', 'trial_ends_at']
+        # an extended or converted trial is no longer expired; the sweeper marks it again when due
+        if self.trial_expired_at and (not self.is_trial or self.trial_ends_at > timezone.now()):
+            self.trial_expired_at = None
+            changed.append('trial_expired_at')
+        if kwargs.get('update_fields') is not None and changed:
+            kwargs['update_fields'] = {*kwargs['update_fields'], *changed}
+        super().save(*args, **kwargs)
 
     @property
     def trial_expired(self):
-        if self.is_trial and self.trial_started:
-            return timezone.now() > self.trial_started + timedelta(days=self.course.trial_days)
-        return False
+        if not self.is_trial:
+            return False
+        if self.trial_expired_at:
+            return True
+        return bool(self.trial_ends_at) and timezone.now() >= self.trial_ends_at
 
     def __str__(self):
         return f"{self.user.username} enrolled in {self.course.title}"
 
 
+class DailyEnrollmentRollup(models.Model):
+    """New, trial and full enrollments per course and local calendar day, maintained by src.services.courses.bll"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_enrollments')
+    date = models.DateField()
+    enrollment_count = models.PositiveIntegerField(default=0)
+    trial_count = models.PositiveIntegerField(default=0)
+    full_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # date first, so trend queries range-scan the constraint's index
+            models.UniqueConstraint(fields=['date', 'course'], name='enrollment_rollup_date_course'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} - {self.date}"
+
+
+class CourseRevenueSummary(models.Model):
+    """Precomputed per-course enrollment and revenue figures, maintained by src.services.courses.bll"""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='revenue_summary')
+    instructor = models.ForeignKey(
+        Instructor, on_delete=models.SET_NULL, null=True, blank=True, related_name='course_revenue_summaries'
+    )
+    enrollment_count = models.PositiveIntegerField(default=0)
+    trial_count = models.PositiveIntegerField(default=0)
+    full_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Course revenue summaries'
+
+    def __str__(self):
+        return f"{self.course_id} - ${self.revenue}"
+
+
+class InstructorRevenueSummary(models.Model):
+    """Precomputed per-instructor roll-up of CourseRevenueSummary"""
+    instructor = models.OneToOneField(
+        Instructor, on_delete=models.CASCADE, primary_key=True, related_name='revenue_summary'
+    )
+    course_count = models.PositiveIntegerField(default=0)
+    enrollment_count = models.PositiveIntegerField(default=0)
+    trial_count = models.PositiveIntegerField(default=0)
+    full_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Instructor revenue summaries'
+
+    def __str__(self):
+        return f"{self.instructor_id} - ${self.revenue}"
+
+
+REPORT_KIND_CHOICES = (
+    ('xlsx', 'Courses report (Excel)'),
+    ('csv', 'Enrollments report (CSV)'),
+)
+REPORT_STATUS_CHOICES = (
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+)
+
+
+class ReportExport(models.Model):
+    """An admin export request, written to the private report storage by the run_report_worker command"""
+    kind = models.CharField(max_length=10, choices=REPORT_KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=REPORT_STATUS_CHOICES, default='pending', db_index=True)
+    file = models.FileField(upload_to=report_upload_to, storage=get_report_storage, null=True, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+
 class CurriculumSection(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='sections')
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the loaded course so moving the section invalidates both curricula
+        instance._loaded_course_id = instance.__dict__.get('course_id')
+        return instance
+
 
 class Lesson(models.Model):
     section = models.ForeignKey(CurriculumSection, on_delete=models.CASCADE, related_name='lessons')
     title = models.CharField(max_length=255)
     content = models.TextField()
     is_preview_available = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.section.title} - {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the loaded section so moving the lesson invalidates both curricula
+        instance._loaded_section_id = instance.__dict__.get('section_id')
+        return instance
+
 
 class PricingPlan(models.Model):
     name = models.CharField(max_length=100)
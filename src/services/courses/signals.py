@@ -0,0 +1,98 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from src.core.images import build_image_variants_on_commit
+from src.core.search import register_searchable
+from . import bll
+from .auth import bump_instructor_version
+from .models import Course, CurriculumSection, Enrollment, Instructor, Lesson
+
+register_searchable('course', Course, 'title', ('description', 'overview'))
+register_searchable('lesson', Lesson, 'title', ('content',))
+
+
+@receiver(post_save, sender=Enrollment, dispatch_uid="enrollment_counters_save")
+def update_counters_on_enrollment_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        bll.enrollment_created(instance.course_id, instance.is_trial, instance.enrolled_on)
+    else:
+        bll.enrollment_changed(
+            getattr(instance, '_loaded_course_id', instance.course_id),
+            getattr(instance, '_loaded_is_trial', instance.is_trial),
+            instance.course_id,
+            instance.is_trial,
+            instance.enrolled_on,
+        )
+    course_ids = {getattr(instance, '_loaded_course_id', instance.course_id), instance.course_id}
+    transaction.on_commit(lambda: bll.invalidate_course_dashboards(*course_ids))
+    instance._loaded_course_id = instance.course_id
+    instance._loaded_is_trial = instance.is_trial
+
+
+@receiver(post_delete, sender=Enrollment, dispatch_uid="enrollment_counters_delete")
+def update_counters_on_enrollment_delete(sender, instance, **kwargs):
+    bll.enrollment_deleted(instance.course_id, instance.is_trial, instance.enrolled_on)
+    course_id = instance.course_id
+    transaction.on_commit(lambda: bll.invalidate_course_dashboards(course_id))
+
+
+@receiver(post_save, sender=Course, dispatch_uid="course_aggregates_save")
+def refresh_course_aggregates_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded_instructor_id = getattr(instance, '_loaded_instructor_id', instance.instructor_id)
+    if not created and loaded_instructor_id != instance.instructor_id:
+        bll.course_instructor_changed(instance.pk, loaded_instructor_id, instance.instructor_id)
+    bll.refresh_course_revenue_summary(instance.pk, loaded_instructor_id)
+    instructor_ids = (loaded_instructor_id, instance.instructor_id)
+    transaction.on_commit(lambda: bll.invalidate_instructor_dashboard(*instructor_ids))
+    instance._loaded_instructor_id = instance.instructor_id
+
+
+@receiver(post_delete, sender=Course, dispatch_uid="course_summary_delete")
+def refresh_course_aggregates_on_delete(sender, instance, **kwargs):
+    instructor_id = instance.instructor_id
+
+    # after commit, so a cascading instructor delete never gets its summary row recreated
+    def refresh():
+        bll.refresh_instructor_revenue_summaries(instructor_id)
+        bll.invalidate_instructor_dashboard(instructor_id)
+    transaction.on_commit(refresh)
+
+
+@receiver([post_save, post_delete], sender=CurriculumSection, dispatch_uid="section_curriculum_cache")
+def invalidate_curriculum_on_section_change(sender, instance, **kwargs):
+    course_ids = {getattr(instance, '_loaded_course_id', instance.course_id), instance.course_id}
+    transaction.on_commit(lambda: bll.invalidate_course_curriculum(*course_ids))
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver([post_save, post_delete], sender=Lesson, dispatch_uid="lesson_curriculum_cache")
+def invalidate_curriculum_on_lesson_change(sender, instance, **kwargs):
+    section_ids = {getattr(instance, '_loaded_section_id', instance.section_id), instance.section_id}
+    course_ids = set()
+    # admin forms and inlines assign the section object, so its course is usually known without a query
+    if Lesson.section.is_cached(instance) and instance.section is not None:
+        course_ids.add(instance.section.course_id)
+        section_ids.discard(instance.section_id)
+    if section_ids:
+        course_ids.update(CurriculumSection.objects.filter(pk__in=section_ids).values_list('course_id', flat=True))
+    transaction.on_commit(lambda: bll.invalidate_course_curriculum(*course_ids))
+    instance._loaded_section_id = instance.section_id
+
+
+@receiver(post_save, sender=Course, dispatch_uid="course_image_variants")
+@receiver(post_save, sender=Instructor, dispatch_uid="instructor_image_variants")
+def build_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        build_image_variants_on_commit(instance.image)
+
+
+@receiver([post_save, post_delete], sender=Instructor, dispatch_uid="instructor_session_snapshots")
+def invalidate_instructor_snapshots(sender, instance, **kwargs):
+    # deactivations and profile edits reach logged-in sessions on their next request
+    instructor_id = instance.pk
+    transaction.on_commit(lambda: bump_instructor_version(instructor_id))
@@ -0,0 +1,298 @@
+import io
+import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipIf
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from src.services.users.models import User
+from .bll import enroll_user, import_enrollments
+from .exports import write_courses_workbook
+from .models import Course, CurriculumSection, Enrollment, Instructor, Lesson
+
+
+class AdminChangelistQueryCountTests(TestCase):
+    """Each annotated changelist costs the same number of queries whatever the number of rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='password')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def create_catalog(self, courses):
+        for number in range(Course.objects.count() + 1, Course.objects.count() + courses + 1):
+            instructor = Instructor.objects.create(
+                name=f'Instructor {number}', title='Teacher', image='instructors/i.jpg',
+                email=f'instructor{number}@example.com', password='password',
+            )
+            course = Course.objects.create(
+                title=f'Course {number}', image='courses/c.jpg', description='Description', overview='Overview',
+                amount=25, lessons_count=2, instructor=instructor,
+            )
+            section = CurriculumSection.objects.create(course=course, title=f'Section {number}')
+            for lesson in range(2):
+                Lesson.objects.create(section=section, title=f'Lesson {number}.{lesson}', content='Content')
+            for student in range(2):
+                user = User.objects.create_user(
+                    username=f'student{number}-{student}', email=f'student{number}-{student}@example.com',
+                    password=None,
+                )
+                Enrollment.objects.create(user=user, course=course, is_trial=bool(student))
+
+    def assertConstantQueries(self, url):
+        self.create_catalog(1)
+        # the first request warms process-wide caches (content types, site) that later requests skip
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as baseline:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.create_catalog(5)
+        with self.assertNumQueries(len(baseline)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_course_changelist(self):
+        response = self.assertConstantQueries(reverse('admin:courses_course_changelist'))
+        self.assertContains(response, '$50.00')
+
+    def test_course_changelist_sorted_by_revenue(self):
+        # revenue is the sixth column of list_display
+        self.assertConstantQueries(reverse('admin:courses_course_changelist') + '?o=-6')
+
+    def test_instructor_changelist(self):
+        self.assertConstantQueries(reverse('admin:courses_instructor_changelist'))
+
+    def test_instructor_changelist_sorted_by_courses(self):
+        self.assertConstantQueries(reverse('admin:courses_instructor_changelist') + '?o=-4.5')
+
+    def test_curriculum_section_changelist(self):
+        self.assertConstantQueries(reverse('admin:courses_curriculumsection_changelist') + '?o=-3')
+
+    def test_lesson_changelist(self):
+        self.assertConstantQueries(reverse('admin:courses_lesson_changelist') + '?o=3')
+
+    def test_courses_admin_site_changelist(self):
+        self.assertConstantQueries(reverse('courses_admin:courses_course_changelist'))
+
+
+class EnrollmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(
+            title='Course', image='courses/c.jpg', description='Description', overview='Overview',
+            amount=25, lessons_count=1,
+        )
+        cls.user = User.objects.create_user(username='student', email='student@example.com', password=None)
+
+    def test_enroll_user_twice_keeps_one_enrollment(self):
+        enrollment, created = enroll_user(self.user, self.course)
+        again, created_again = enroll_user(self.user, self.course)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, enrollment.pk)
+        self.assertEqual(Enrollment.objects.filter(user=self.user, course=self.course).count(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.enrollment_count, self.course.trial_count), (1, 1))
+
+    def test_enroll_user_inserts_without_checking_first(self):
+        with CaptureQueriesContext(connection) as queries:
+            enroll_user(self.user, self.course)
+        # the counter and rollup updates of the post_save handlers follow the INSERT
+        statements = [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertTrue(statements[0].startswith('INSERT INTO "courses_enrollment"'), statements[0])
+
+    def test_enroll_user_reraises_errors_other_than_duplicates(self):
+        with mock.patch.object(Enrollment.objects, 'create', side_effect=IntegrityError('NOT NULL constraint failed')):
+            with self.assertRaisesMessage(IntegrityError, 'NOT NULL constraint failed'):
+                enroll_user(self.user, self.course)
+
+
+class ImportEnrollmentsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='password')
+        cls.course = Course.objects.create(
+            title='Course', image='courses/c.jpg', description='Description', overview='Overview',
+            amount=25, lessons_count=1, is_trial_available=False,
+        )
+        cls.users = [
+            User.objects.create_user(username=f'student{number}', email=f'student{number}@example.com', password=None)
+            for number in range(3)
+        ]
+
+    def test_counts_only_inserted_rows(self):
+        enroll_user(self.users[0], self.course)
+
+        result = import_enrollments(self.course, [
+            'student0@example.com', 'student1@example.com', 'student2@example.com', 'nobody@example.com',
+        ])
+
+        self.assertEqual((result.created, result.skipped, result.unknown), (2, 1, 1))
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 3)
+
+    def test_admin_rejects_non_utf8_file(self):
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile('students.csv', 'email\nstudent0@example.com\nJosé <x\xe9>\n'.encode('cp1252'))
+
+        response = self.client.post(
+            reverse('admin:courses_course_import_enrollments', args=[self.course.pk]), {'csv_file': upload}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Could not read the file as a UTF-8 CSV')
+        self.assertFalse(Enrollment.objects.exists())
+
+
+@skipIf(
+    connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME'],
+    'in-memory SQLite test databases lock whole tables for concurrent writers; set TEST NAME to run it on SQLite',
+)
+class ConcurrentEnrollmentTests(TransactionTestCase):
+    """Parallel enroll requests for the same user and course leave exactly one enrollment"""
+    requests = 8
+
+    def setUp(self):
+        self.course = Course.objects.create(
+            title='Course', image='courses/c.jpg', description='Description', overview='Overview',
+            amount=25, lessons_count=1, is_trial_available=False,
+        )
+        self.user = User.objects.create_user(username='student', email='student@example.com', password=None)
+
+    def enroll(self, barrier):
+        client = Client()
+        client.force_login(self.user)
+        barrier.wait()
+        try:
+            return client.post(reverse('website:enroll_course', args=[self.course.pk])).json()['status']
+        finally:
+            connection.close()
+
+    def test_parallel_requests(self):
+        barrier = threading.Barrier(self.requests)
+        with ThreadPoolExecutor(max_workers=self.requests) as executor:
+            statuses = list(executor.map(lambda _: self.enroll(barrier), range(self.requests)))
+
+        self.assertEqual(statuses.count('success'), 1)
+        self.assertEqual(statuses.count('already_enrolled'), self.requests - 1)
+        self.assertEqual(Enrollment.objects.filter(user=self.user, course=self.course).count(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.enrollment_count, self.course.full_count), (1, 1))
+
+
+class InstructorSessionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = Instructor.objects.create(
+            name='Instructor', title='Teacher', image='instructors/i.jpg',
+            email='instructor@example.com', password='password',
+        )
+
+    def setUp(self):
+        cache.clear()
+        response = self.client.post(
+            reverse('courses:instructor_login'), {'email': 'instructor@example.com', 'password': 'password'}
+        )
+        self.assertRedirects(response, reverse('courses:instructor_dashboard'), fetch_redirect_response=False)
+
+    def test_deactivation_ends_the_session_before_the_snapshot_expires(self):
+        dashboard = reverse('courses:instructor_dashboard')
+        self.assertEqual(self.client.get(dashboard).status_code, 200)
+
+        self.instructor.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.instructor.save(update_fields=['is_active'])
+
+        self.assertRedirects(self.client.get(dashboard), reverse('website:unified_login'), fetch_redirect_response=False)
+        self.assertNotIn('instructor_id', self.client.session)
+
+    def test_logout_replaces_the_session_key(self):
+        session_key = self.client.session.session_key
+
+        self.client.get(reverse('courses:instructor_logout'))
+
+        self.assertNotEqual(self.client.session.session_key, session_key)
+        self.assertNotIn('instructor_id', self.client.session)
+
+
+class ConditionalGetTests(TestCase):
+    """The ETags change whenever what the page shows does, including through queryset updates"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.courses = [
+            Course.objects.create(
+                title=f'Course {number}', image='courses/c.jpg', description='Description', overview='Overview',
+                amount=25, lessons_count=1,
+            ) for number in range(2)
+        ]
+        cls.user = User.objects.create_user(username='student', email='student@example.com', password=None)
+
+    def setUp(self):
+        cache.clear()
+
+    def etag(self, url):
+        return self.client.get(url)['ETag']
+
+    def test_catalog_etag_follows_enrollments_moved_between_courses(self):
+        url = reverse('website:courses')
+        enrollment, _ = enroll_user(self.user, self.courses[0])
+        etag = self.etag(url)
+
+        enrollment.course = self.courses[1]
+        enrollment.save()
+
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_course_etag_follows_trial_expiry(self):
+        self.client.force_login(self.user)
+        url = reverse('website:courses-details', args=[self.courses[0].pk])
+        enrollment, _ = enroll_user(self.user, self.courses[0])
+        etag = self.etag(url)
+
+        Enrollment.objects.filter(pk=enrollment.pk).update(trial_expired_at=timezone.now())
+
+        self.assertNotEqual(self.etag(url), etag)
+
+
+class CoursesWorkbookTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(
+            title='Course', image='courses/c.jpg', description='Description', overview='Overview',
+            amount=25, lessons_count=1,
+        )
+        for number in range(5):
+            user = User.objects.create_user(
+                username=f'student{number}', email=f'student{number}@example.com', password=None
+            )
+            enroll_user(user, course)
+
+    def test_rows_past_the_sheet_limit_continue_on_a_new_worksheet(self):
+        output = io.BytesIO()
+        # a header and two enrollments per worksheet
+        with mock.patch('src.services.courses.exports.XLSX_MAX_ROWS', 3):
+            write_courses_workbook(output)
+
+        with zipfile.ZipFile(output) as workbook:
+            names = re.findall(r'<sheet name="([^"]+)"', workbook.read('xl/workbook.xml').decode())
+        self.assertEqual(names, [
+            'Courses', 'Enrollments', 'Enrollments (2)', 'Enrollments (3)', 'Statistics', 'Statistics (2)', 'Statistics (3)',
+        ])
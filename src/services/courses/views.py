@@ -4,10 +4,11 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from django.utils import timezone
 from django.db.models import Count, Q
+from src.core.pagination import paginate_by_keyset
+from .auth import authenticate_instructor, login_instructor, logout_instructor, update_instructor_session
+from .bll import ENROLLMENTS_PAGE_SIZE, get_enrollment_counts, get_instructor_dashboard
 from .models import Course, Enrollment, Instructor
-from django.contrib.auth.hashers import make_password, check_password
 
 
 def instructor_login(request):
@@ -16,39 +17,19 @@ def instructor_login(request):
         email = request.POST.get('email')
         password = request.POST.get('password')
         
-        # Find instructor by email
-        try:
-            instructor = Instructor.objects.get(email=email, is_active=True)
-            
-            # Check password
-            if check_password(password, instructor.password):
-                # Update last login
-                instructor.last_login = timezone.now()
-                instructor.save()
-                
-                # Store instructor in session
-                request.session['instructor_id'] = instructor.id
-                request.session['instructor_name'] = instructor.name
-                
-                messages.success(request, f'Welcome back, {instructor.name}!')
-                return redirect('instructor_dashboard')
-            else:
-                messages.error(request, 'Invalid password.')
-        except Instructor.DoesNotExist:
-            messages.error(request, 'Instructor not found or account is not active.')
+        instructor = authenticate_instructor(email, password)
+        if instructor is not None:
+            login_instructor(request, instructor)
+            messages.success(request, f'Welcome back, {instructor.name}!')
+            return redirect('courses:instructor_dashboard')
+        messages.error(request, 'Invalid e-mail or password, or the account is not active.')
     
     return render(request, 'instructor/login.html')
 
 
 def instructor_logout(request):
     """Instructor logout view"""
-    # Clear instructor session
-    if 'instructor_id' in request.session:
-        del request.session['instructor_id']
-    if 'instructor_name' in request.session:
-        del request.session['instructor_name']
-    if 'user_type' in request.session:
-        del request.session['user_type']
+    logout_instructor(request)
     
     messages.success(request, 'You have been logged out successfully.')
     return redirect('website:unified_login')
@@ -57,7 +38,8 @@ def instructor_logout(request):
 def instructor_required(view_func):
     """Decorator to check if user is logged in as instructor"""
     def wrapper(request, *args, **kwargs):
-        if 'instructor_id' not in request.session or request.session.get('user_type') != 'instructor':
+        # request.instructor is attached lazily by InstructorMiddleware
+        if not request.instructor:
             messages.error(request, 'Please log in to access this page.')
             return redirect('website:unified_login')
         return view_func(request, *args, **kwargs)
@@ -67,40 +49,11 @@ def instructor_required(view_func):
 @instructor_required
 def instructor_dashboard(request):
     """Instructor dashboard view"""
-    instructor_id = request.session['instructor_id']
-    instructor = get_object_or_404(Instructor, id=instructor_id)
-    
-    # Get instructor's courses
-    courses = Course.objects.filter(instructor=instructor)
-    
-    # Get enrollment statistics
-    total_enrollments = Enrollment.objects.filter(course__instructor=instructor).count()
-    trial_enrollments = Enrollment.objects.filter(course__instructor=instructor, is_trial=True).count()
-    full_enrollments = Enrollment.objects.filter(course__instructor=instructor, is_trial=False).count()
-    
-    # Get recent enrollments
-    recent_enrollments = Enrollment.objects.filter(
-        course__instructor=instructor
-    ).select_related('user', 'course').order_by('-enrolled_on')[:10]
-    
-    # Get top performing courses
-    top_courses = courses.annotate(
-        enrollment_count=Count('enrollment')
-    ).order_by('-enrollment_count')[:5]
-    
-    # Calculate revenue
-    total_revenue = sum(course.price * course.enrollment_set.count() for course in courses)
+    instructor = request.instructor
     
     context = {
         'instructor': instructor,
-        'courses': courses,
-        'total_courses': courses.count(),
-        'total_enrollments': total_enrollments,
-        'trial_enrollments': trial_enrollments,
-        'full_enrollments': full_enrollments,
-        'total_revenue': total_revenue,
-        'recent_enrollments': recent_enrollments,
-        'top_courses': top_courses,
+        **get_instructor_dashboard(instructor),
     }
     
     return render(request, 'instructor/dashboard.html', context)
@@ -109,12 +62,9 @@ def instructor_dashboard(request):
 @instructor_required
 def instructor_courses(request):
     """Instructor's courses view"""
-    instructor_id = request.session['instructor_id']
-    instructor = get_object_or_404(Instructor, id=instructor_id)
+    instructor = request.instructor
     
-    courses = Course.objects.filter(instructor=instructor).annotate(
-        enrollment_count=Count('enrollment')
-    ).order_by('-id')
+    courses = Course.objects.filter(instructor=instructor).order_by('-id')
     
     context = {
         'instructor': instructor,
@@ -127,24 +77,30 @@ def instructor_courses(request):
 @instructor_required
 def instructor_course_detail(request, course_id):
     """Instructor's course detail view"""
-    instructor_id = request.session['instructor_id']
-    instructor = get_object_or_404(Instructor, id=instructor_id)
+    instructor = request.instructor
     
     course = get_object_or_404(Course, id=course_id, instructor=instructor)
     
-    # Get enrollments for this course
-    enrollments = Enrollment.objects.filter(course=course).select_related('user').order_by('-enrolled_on')
+    # Get enrollments for this course, one keyset page at a time
+    enrollments = Enrollment.objects.filter(course=course).select_related('user', 'course')
+    trial_filter = request.GET.get('trial')
+    if trial_filter == 'true':
+        enrollments = enrollments.filter(is_trial=True)
+    elif trial_filter == 'false':
+        enrollments = enrollments.filter(is_trial=False)
+    page = paginate_by_keyset(enrollments, 'enrolled_on', ENROLLMENTS_PAGE_SIZE, request.GET)
     
     # Get statistics
-    total_enrollments = enrollments.count()
-    trial_enrollments = enrollments.filter(is_trial=True).count()
-    full_enrollments = enrollments.filter(is_trial=False).count()
-    revenue = course.price * total_enrollments
+    total_enrollments = course.enrollment_count
+    trial_enrollments = course.trial_count
+    full_enrollments = course.full_count
+    revenue = (course.amount or 0) * total_enrollments
     
     context = {
         'instructor': instructor,
         'course': course,
-        'enrollments': enrollments,
+        'enrollments': page,
+        'trial_filter': trial_filter,
         'total_enrollments': total_enrollments,
         'trial_enrollments': trial_enrollments,
         'full_enrollments': full_enrollments,
@@ -157,13 +113,12 @@ def instructor_course_detail(request, course_id):
 @instructor_required
 def instructor_students(request):
     """Instructor's students view"""
-    instructor_id = request.session['instructor_id']
-    instructor = get_object_or_404(Instructor, id=instructor_id)
+    instructor = request.instructor
     
     # Get all enrollments for instructor's courses
     enrollments = Enrollment.objects.filter(
         course__instructor=instructor
-    ).select_related('user', 'course').order_by('-enrolled_on')
+    ).select_related('user', 'course')
     
     # Filter by trial status if requested
     trial_filter = request.GET.get('trial')
@@ -181,12 +136,15 @@ def instructor_students(request):
             Q(course__title__icontains=search)
         )
     
+    counts = get_enrollment_counts(enrollments)
+    page = paginate_by_keyset(enrollments, 'enrolled_on', ENROLLMENTS_PAGE_SIZE, request.GET)
+    
     context = {
         'instructor': instructor,
-        'enrollments': enrollments,
-        'total_students': enrollments.count(),
-        'trial_students': enrollments.filter(is_trial=True).count(),
-        'full_students': enrollments.filter(is_trial=False).count(),
+        'enrollments': page,
+        'total_students': counts['total'],
+        'trial_students': counts['trial'],
+        'full_students': counts['full'],
     }
     
     return render(request, 'instructor/students.html', context)
@@ -195,8 +153,8 @@ def instructor_students(request):
 @instructor_required
 def instructor_profile(request):
     """Instructor's profile view"""
-    instructor_id = request.session['instructor_id']
-    instructor = get_object_or_404(Instructor, id=instructor_id)
+    # the full row, for the current counters and a save that leaves the password alone
+    instructor = get_object_or_404(Instructor, pk=request.instructor.pk)
     
     if request.method == 'POST':
         # Handle profile update
@@ -208,9 +166,10 @@ def instructor_profile(request):
         if 'image' in request.FILES:
             instructor.image = request.FILES['image']
         
-        instructor.save()
+        instructor.save(update_fields=['name', 'title', 'bio', 'image', 'updated_at'])
+        update_instructor_session(request, instructor)
         messages.success(request, 'Profile updated successfully!')
-        return redirect('instructor_profile')
+        return redirect('courses:instructor_profile')
     
     context = {
         'instructor': instructor,
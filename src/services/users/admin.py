@@ -25,6 +25,7 @@ from django.utils.translation import gettext, gettext_lazy as _
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.debug import sensitive_post_parameters
 
+from src.core.pagination import ApproximateCountPaginator
 from .models import (
     User
 )
@@ -54,6 +55,8 @@ class UserCustomAdmin(admin.ModelAdmin):
     ]
     list_filter = [
         'is_active', 'is_superuser', 'is_staff']
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
     add_fieldsets = (
         (None, {
             'classes': ('wide',),
@@ -0,0 +1,38 @@
+from django.contrib.auth.backends import ModelBackend
+from django.db.models.functions import Lower
+
+from .models import User
+
+
+def get_user_by_email(email):
+    """
+    Case-insensitive lookup served by the user_email_lower index. The e-mail column is only
+    unique case-sensitively, so when several accounts share the address in different cases
+    only the exact match is returned, and None when there is none.
+    """
+    email = email.strip()
+    users = list(User.objects.annotate(email_lower=Lower('email')).filter(email_lower=email.lower()))
+    if len(users) == 1:
+        return users[0]
+    return next((user for user in users if user.email == email), None)
+
+
+class EmailBackend(ModelBackend):
+    """
+    Password login by e-mail: one query fetches the user and at most one hash is verified.
+    An unknown address still runs the hasher once, so response times do not reveal which
+    addresses are registered. A failed login returns None so the backends listed after this
+    one (allauth) still get their turn.
+    """
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        email = email or username or kwargs.get(User.USERNAME_FIELD)
+        if not email or password is None:
+            return None
+        user = get_user_by_email(email)
+        if user is None:
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
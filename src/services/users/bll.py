@@ -0,0 +1,117 @@
+import json
+import os
+from collections import namedtuple
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .models import User
+
+USER_IMPORT_BATCH_SIZE = 1000
+USER_IMPORT_FIELDS = ('username', 'first_name', 'last_name', 'phone_number', 'country', 'city')
+
+UserImportResult = namedtuple('UserImportResult', 'created skipped invalid')
+
+
+def init_password_worker():
+    # spawned workers (macOS, Windows) start without Django configured
+    django.setup()
+
+
+def hash_password(raw_password):
+    """make_password for process pools; an empty password yields an unusable one"""
+    return make_password(raw_password or None)
+
+
+def read_checkpoint(path):
+    """Number of CSV rows already imported according to the checkpoint file, 0 when there is none"""
+    try:
+        with open(path) as file:
+            return int(json.load(file)['rows'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0
+
+
+def write_checkpoint(path, rows):
+    # write then rename, so an interrupted run never leaves a truncated checkpoint behind
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump({'rows': rows}, file)
+    os.replace(temporary, path)
+
+
+def _clean_user_row(row):
+    email = User.objects.normalize_email((row.get('email') or '').strip())
+    values = {field: (row.get(field) or '').strip() for field in USER_IMPORT_FIELDS}
+    values['username'] = values['username'] or email
+    try:
+        validate_email(email)
+        # lengths and the username characters; one bad value would otherwise fail the whole INSERT
+        for field, value in (('email', email), *values.items()):
+            User._meta.get_field(field).run_validators(value)
+    except ValidationError:
+        return None
+    return email, values, row.get('password') or ''
+
+
+def _free_user_rows(rows):
+    """The (email, values, password) rows whose e-mail and username are free, in the database and earlier in the list"""
+    emails = {email.lower() for email, _, _ in rows}
+    usernames = {values['username'] for _, values, _ in rows}
+    taken_emails = set(User.objects.annotate(email_lower=Lower('email')).filter(
+        email_lower__in=emails
+    ).values_list('email_lower', flat=True))
+    taken_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+    free = []
+    for email, values, password in rows:
+        if email.lower() in taken_emails or values['username'] in taken_usernames:
+            continue
+        taken_emails.add(email.lower())
+        taken_usernames.add(values['username'])
+        free.append((email, values, password))
+    return free
+
+
+def import_user_batch(rows, executor=None):
+    """
+    Create the users of one batch of CSV rows (dicts). Rows whose e-mail or username is
+    already taken, in the database or earlier in the batch, are skipped before any password
+    is hashed. Hashing runs on the executor's worker processes when one is given, then the
+    users are written with one bulk INSERT.
+    """
+    cleaned, invalid = [], 0
+    for row in rows:
+        user = _clean_user_row(row)
+        if user is None:
+            invalid += 1
+        else:
+            cleaned.append(user)
+
+    pending = _free_user_rows(cleaned)
+    passwords = [password for _, _, password in pending]
+    if executor is not None:
+        hashes = executor.map(hash_password, passwords, chunksize=max(1, len(passwords) // 32))
+    else:
+        hashes = map(hash_password, passwords)
+    pending = [(email, values, password_hash) for (email, values, _), password_hash in zip(pending, hashes)]
+
+    while True:
+        try:
+            # all or nothing, so the number of users created is exactly len(pending)
+            with transaction.atomic():
+                User.objects.bulk_create([
+                    User(email=email, password=password_hash, **values) for email, values, password_hash in pending
+                ], batch_size=USER_IMPORT_BATCH_SIZE)
+        except IntegrityError:
+            # a concurrent sign-up took one of these addresses or usernames; drop it and retry
+            free = _free_user_rows(pending)
+            if len(free) == len(pending):
+                raise
+            pending = free
+            continue
+        return UserImportResult(created=len(pending), skipped=len(cleaned) - len(pending), invalid=invalid)
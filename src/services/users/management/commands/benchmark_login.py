@@ -0,0 +1,70 @@
+import statistics
+from time import perf_counter
+
+from django.contrib.auth import authenticate
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from src.services.users.models import User
+
+BENCHMARK_EMAIL = 'Login.Benchmark@example.com'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+# the backends and the two-step lookup unified_login used before EmailBackend
+LEGACY_BACKENDS = [
+    'django.contrib.auth.backends.ModelBackend',
+    'allauth.account.auth_backends.AuthenticationBackend',
+]
+
+
+def legacy_login(request, email, password):
+    with override_settings(AUTHENTICATION_BACKENDS=LEGACY_BACKENDS):
+        user = authenticate(request, username=email, password=password)
+        if user is None:
+            try:
+                user_obj = User.objects.get(email=email)
+                user = authenticate(request, username=user_obj.username, password=password)
+            except User.DoesNotExist:
+                user = None
+        return user
+
+
+def email_login(request, email, password):
+    return authenticate(request, email=email, password=password)
+
+
+class Command(BaseCommand):
+    help = 'Compare the latency and query count of the legacy student login path with the e-mail backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10, help='Logins per path and scenario')
+
+    def handle(self, *args, **options):
+        scenarios = (
+            ('valid password', BENCHMARK_EMAIL, BENCHMARK_PASSWORD),
+            ('mixed-case e-mail', BENCHMARK_EMAIL.upper(), BENCHMARK_PASSWORD),
+            ('wrong password', BENCHMARK_EMAIL, 'wrong-password'),
+            ('unknown e-mail', 'nobody.benchmark@example.com', BENCHMARK_PASSWORD),
+        )
+        request = RequestFactory().post('/login/')
+
+        # the benchmark account never outlives the run
+        with transaction.atomic():
+            User.objects.create_user(username='login-benchmark', email=BENCHMARK_EMAIL, password=BENCHMARK_PASSWORD)
+            for scenario, email, password in scenarios:
+                for name, login in (('legacy', legacy_login), ('email backend', email_login)):
+                    latencies = []
+                    for _ in range(options['iterations']):
+                        with CaptureQueriesContext(connection) as queries:
+                            began = perf_counter()
+                            user = login(request, email, password)
+                            latencies.append(perf_counter() - began)
+                    self.stdout.write(
+                        f"{scenario:<18} {name:<14} {'ok' if user else 'rejected':<9} "
+                        f"median {statistics.median(latencies) * 1000:7.1f} ms  "
+                        f"max {max(latencies) * 1000:7.1f} ms  {len(queries)} queries"
+                    )
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,69 @@
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.services.users.bll import (
+    USER_IMPORT_BATCH_SIZE, import_user_batch, init_password_worker, read_checkpoint, write_checkpoint
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV with an email column and optional username, first_name, last_name, "
+        "phone_number, country, city and password columns"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=USER_IMPORT_BATCH_SIZE,
+                            help='Rows hashed and inserted per transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Processes used for password hashing')
+        parser.add_argument('--checkpoint', help='Progress file (default: <csv_file>.checkpoint)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the checkpoint and start from the first row')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint'] or f"{options['csv_file']}.checkpoint"
+        done = 0 if options['restart'] else read_checkpoint(checkpoint)
+        if done:
+            self.stdout.write(f"Resuming after row {done} from {checkpoint}")
+
+        try:
+            file = open(options['csv_file'], newline='', encoding='utf-8-sig')
+        except OSError as error:
+            raise CommandError(f"Could not read {options['csv_file']}: {error}")
+
+        totals = {'created': 0, 'skipped': 0, 'invalid': 0}
+        started = time.monotonic()
+        with file, ProcessPoolExecutor(max_workers=options['workers'], initializer=init_password_worker) as executor:
+            reader = csv.DictReader(file)
+            if 'email' not in (reader.fieldnames or []):
+                raise CommandError('The CSV needs an "email" column.')
+            rows = itertools.islice(reader, done, None)
+            while True:
+                batch = list(itertools.islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                result = import_user_batch(batch, executor)
+                done += len(batch)
+                # only after the batch is committed; re-running a batch is harmless since taken e-mails are skipped
+                write_checkpoint(checkpoint, done)
+                for field, value in result._asdict().items():
+                    totals[field] += value
+                rate = sum(totals.values()) / max(time.monotonic() - started, 0.001)
+                self.stdout.write(
+                    f"{done} rows: {totals['created']} created, {totals['skipped']} skipped, "
+                    f"{totals['invalid']} invalid ({rate:.0f} rows/s)"
+                )
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['created']} users; {totals['skipped']} already existed and "
+            f"{totals['invalid']} rows had no valid e-mail."
+        ))
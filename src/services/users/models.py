@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django_resized import ResizedImageField
@@ -22,6 +23,10 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            # case-insensitive e-mail lookups (login, imports)
+            models.Index(Lower('email'), name='user_email_lower'),
+        ]
         verbose_name = 'User'
         verbose_name_plural = 'Users'
 
@@ -0,0 +1,56 @@
+from django.contrib.auth import authenticate
+from django.test import TestCase
+
+from .backends import EmailBackend
+from .bll import import_user_batch
+from .models import User
+
+
+class ImportUserBatchTests(TestCase):
+
+    def test_over_long_values_are_invalid_rows(self):
+        rows = [
+            {'email': 'ok@example.com', 'city': 'Lahore'},
+            {'email': f"{'a' * 150}@example.com"},
+            {'email': 'city@example.com', 'city': 'x' * 21},
+            {'email': 'name@example.com', 'username': 'y' * 151},
+        ]
+
+        result = import_user_batch(rows)
+
+        self.assertEqual((result.created, result.skipped, result.invalid), (1, 0, 3))
+        self.assertEqual(list(User.objects.values_list('email', flat=True)), ['ok@example.com'])
+
+    def test_taken_addresses_are_skipped(self):
+        User.objects.create_user(username='taken', email='Taken@example.com', password=None)
+
+        result = import_user_batch([{'email': 'taken@example.com'}, {'email': 'new@example.com'}])
+
+        self.assertEqual((result.created, result.skipped, result.invalid), (1, 1, 0))
+
+
+class EmailBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lower = User.objects.create_user(username='lower', email='student@example.com', password='first')
+        cls.upper = User.objects.create_user(username='upper', email='Student@example.com', password='second')
+
+    def authenticate(self, email, password):
+        return EmailBackend().authenticate(None, username=email, password=password)
+
+    def test_case_variant_addresses_log_in_with_their_exact_address(self):
+        self.assertEqual(self.authenticate('student@example.com', 'first'), self.lower)
+        self.assertEqual(self.authenticate('Student@example.com', 'second'), self.upper)
+        self.assertIsNone(self.authenticate('STUDENT@example.com', 'first'))
+
+    def test_failed_login_returns_none(self):
+        # PermissionDenied would stop authenticate() before the backends listed after this one
+        self.assertIsNone(self.authenticate('student@example.com', 'second'))
+        self.assertIsNone(self.authenticate('nobody@example.com', 'first'))
+
+    def test_failed_login_is_checked_once(self):
+        # no other password backend runs after EmailBackend to fetch and hash again
+        for email in ('student@example.com', 'nobody@example.com'):
+            with self.assertNumQueries(1):
+                self.assertIsNone(authenticate(email=email, password='wrong'))
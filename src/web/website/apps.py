@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class WebsiteConfig(AppConfig):
+    name = 'src.web.website'
+    verbose_name = 'Website'
+
+    def ready(self):
+        # cached pages register their model dependencies when the views are defined
+        import src.web.website.views
@@ -1,7 +1,7 @@
 from django.urls import path
 
 from src.web.website.views import HomeView, AboutView, ContactView, CoursesView, ServicesView, ScholarsView, \
-    CoursesDetailsView, VideoListView, ProfileView, enroll_course, my_courses, unified_login, unified_logout, PricingView
+    CoursesDetailsView, VideoListView, ProfileView, enroll_course, my_courses, unified_login, unified_logout, PricingView, stream_video
 
 app_name = "website"
 urlpatterns = [
@@ -13,6 +13,7 @@ urlpatterns = [
     path('services/',ServicesView.as_view() , name="services"),
     path('pricing/', PricingView.as_view(), name="pricing"),
     path('videos/',VideoListView.as_view() , name="videos"),
+    path('videos/<int:pk>/stream/', stream_video, name="video_stream"),
     path('scholars', ScholarsView.as_view() , name="scholars"),
     path('profile/', ProfileView.as_view(), name="profile"),
     path('enroll-course/<int:course_id>/', enroll_course, name="enroll_course"),
@@ -7,23 +7,31 @@ from django.utils.decorators import method_decorator
 from django.contrib.auth import update_session_auth_hash, authenticate, login, logout
 from django.contrib.auth.forms import PasswordChangeForm
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.utils import timezone
+from django.views.decorators.http import require_POST, require_safe
 from django.db.models import Count, Q
 from django.contrib.auth.hashers import check_password
 from .forms import UserProfileForm, ChangePasswordForm
-from src.services.users.models import User
-from src.services.courses.models import Course, Enrollment, Instructor
+from src.services.courses.bll import (
+    CURRICULUM_CACHE_TIMEOUT, enroll_user, get_catalog_validators, get_course_curriculum, get_course_validators,
+    search_course_ids
+)
+from src.services.courses.auth import authenticate_instructor, login_instructor, logout_instructor
+from src.services.courses.models import Course, Enrollment, Instructor, Lesson
 from src.core.models import Service, GalleryImage, Testimonial, Application, Video
 from src.core.filters import VideoFilter
 from src.core.forms import ContactMessageForm
+from src.core.mixins import AnonymousPageCacheMixin, ConditionalGetMixin
+from src.core.pagination import ApproximateCountPaginator
+from src.core.search import order_by_ids
+from src.core.streaming import ranged_file_response
 from src.services.courses.models import PricingPlan
 
 
 # Create your views here.
 
-class HomeView(TemplateView):
+class HomeView(AnonymousPageCacheMixin, TemplateView):
     template_name = "website/home.html"
+    cache_dependencies = (Course, Enrollment, Service, Instructor, GalleryImage, Testimonial, Application)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -46,8 +54,9 @@ class ContactView(FormView):
         return super().form_valid(form)
 
 
-class AboutView(TemplateView):
+class AboutView(AnonymousPageCacheMixin, TemplateView):
     template_name = "website/about.html"
+    cache_dependencies = (Instructor, Testimonial, Application)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -57,22 +66,51 @@ class AboutView(TemplateView):
 
 
 
-class CoursesView(ListView):
+class CoursesView(ConditionalGetMixin, AnonymousPageCacheMixin, ListView):
     model = Course
     template_name = "website/courses.html"
     context_object_name = 'courses'
-    
+    cache_dependencies = (Course, Enrollment, Instructor, Lesson, Application)
+    cache_query_params = ('q',)
+
+    def get_validators(self):
+        # search results also depend on lesson content, which the catalog validators do not cover
+        if self.request.GET.get('q'):
+            return None
+        return get_catalog_validators()
+
     def get_queryset(self):
+        query = self.request.GET.get('q', '').strip()
+        if query:
+            return order_by_ids(Course.objects.all(), search_course_ids(query))
         return Course.objects.order_by('-id')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '').strip()
+        return context
+
 
-class CoursesDetailsView(DetailView):
+class CoursesDetailsView(ConditionalGetMixin, DetailView):
     model = Course
+    queryset = Course.objects.select_related('instructor')
     template_name = "website/courses-details.html"
     context_object_name = 'course'
-    
+
+    def get_validators(self):
+        validators = get_course_validators(self.kwargs['pk'])
+        if validators is None or not self.request.user.is_authenticated:
+            return validators
+        parts, last_modified = validators
+        enrollment = Enrollment.objects.filter(
+            user=self.request.user, course_id=self.kwargs['pk']
+        ).values_list('pk', 'enrolled_on', 'is_trial', 'trial_ends_at', 'trial_expired_at').first()
+        return (parts, enrollment), last_modified
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['curriculum'] = get_course_curriculum(self.object)
+        context['curriculum_cache_timeout'] = CURRICULUM_CACHE_TIMEOUT
         if self.request.user.is_authenticated:
             context['user_enrollment'] = Enrollment.objects.filter(
                 user=self.request.user, 
@@ -81,10 +119,11 @@ class CoursesDetailsView(DetailView):
         return context
 
 
-class ServicesView(ListView):
+class ServicesView(AnonymousPageCacheMixin, ListView):
     model = Service
     template_name = "website/services.html"
     context_object_name = 'services'
+    cache_dependencies = (Service, Application)
 
 
 class VideoListView(ListView):
@@ -92,6 +131,7 @@ class VideoListView(ListView):
     template_name = 'website/videos.html'
     context_object_name = 'videos'
     paginate_by = 6
+    paginator_class = ApproximateCountPaginator
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -104,8 +144,15 @@ class VideoListView(ListView):
         return context
 
 
-class PricingView(TemplateView):
+@require_safe
+def stream_video(request, pk):
+    video = get_object_or_404(Video, pk=pk)
+    return ranged_file_response(request, video.video_file)
+
+
+class PricingView(AnonymousPageCacheMixin, TemplateView):
     template_name = "website/pricing.html"
+    cache_dependencies = (PricingPlan, Application)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -115,8 +162,9 @@ class PricingView(TemplateView):
         ).order_by('custom_order', 'price')
         return context
 
-class ScholarsView(TemplateView):
+class ScholarsView(AnonymousPageCacheMixin, TemplateView):
     template_name = "website/scholars.html"
+    cache_dependencies = (Application,)
 
 
 @method_decorator(login_required, name='dispatch')
@@ -172,22 +220,11 @@ class ProfileView(TemplateView):
 def enroll_course(request, course_id):
     """Enroll user in a course"""
     course = get_object_or_404(Course, id=course_id)
-    user = request.user
     
-    # Check if user is already enrolled
-    if Enrollment.objects.filter(user=user, course=course).exists():
-        messages.warning(request, f"You are already enrolled in {course.title}")
+    # the page script reports the outcome, so no flash messages are queued for the next page
+    enrollment, created = enroll_user(request.user, course)
+    if not created:
         return JsonResponse({'status': 'already_enrolled', 'message': 'Already enrolled'})
-    
-    # Create enrollment
-    enrollment = Enrollment.objects.create(
-        user=user,
-        course=course,
-        is_trial=course.is_trial_available,
-        trial_started=timezone.now() if course.is_trial_available else None
-    )
-    
-    messages.success(request, f"Successfully enrolled in {course.title}")
     return JsonResponse({'status': 'success', 'message': 'Enrollment successful'})
 
 @login_required
@@ -214,35 +251,15 @@ def unified_login(request):
         user_type = request.POST.get('user_type', 'student')
         
         if user_type == 'instructor':
-            # Try instructor login
-            try:
-                instructor = Instructor.objects.get(email=email, is_active=True)
-                if instructor.check_password(password):
-                    # Update last login
-                    instructor.last_login = timezone.now()
-                    instructor.save()
-                    
-                    # Store instructor in session
-                    request.session['instructor_id'] = instructor.id
-                    request.session['instructor_name'] = instructor.name
-                    request.session['user_type'] = 'instructor'
-                    
-                    messages.success(request, f'Welcome back, {instructor.name}!')
-                    return redirect('courses:instructor_dashboard')
-                else:
-                    messages.error(request, 'Invalid password.')
-            except Instructor.DoesNotExist:
-                messages.error(request, 'Instructor not found or account is not active.')
+            instructor = authenticate_instructor(email, password)
+            if instructor is not None:
+                login_instructor(request, instructor)
+                messages.success(request, f'Welcome back, {instructor.name}!')
+                return redirect('courses:instructor_dashboard')
+            messages.error(request, 'Invalid e-mail or password, or the account is not active.')
         else:
-            # Try student login - first try with email as username, then try to find user by email
-            user = authenticate(request, username=email, password=password)
-            if user is None:
-                # Try to find user by email
-                try:
-                    user_obj = User.objects.get(email=email)
-                    user = authenticate(request, username=user_obj.username, password=password)
-                except User.DoesNotExist:
-                    user = None
+            # one case-insensitive user fetch and at most one password check (EmailBackend)
+            user = authenticate(request, email=email, password=password)
             
             if user is not None:
                 login(request, user)
@@ -259,13 +276,7 @@ def unified_logout(request):
     user_type = request.session.get('user_type')
     
     if user_type == 'instructor':
-        # Clear instructor session
-        if 'instructor_id' in request.session:
-            del request.session['instructor_id']
-        if 'instructor_name' in request.session:
-            del request.session['instructor_name']
-        if 'user_type' in request.session:
-            del request.session['user_type']
+        logout_instructor(request)
         messages.success(request, 'You have been logged out successfully.')
         return redirect('website:unified_login')
     else: